@@ -0,0 +1,150 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlmodel import Session, select, func, delete, update
+from database import engine
+from models import AIResultCache
+from audio_store import write_atomic
+
+logger = logging.getLogger(__name__)
+
+# Max number of cached results; least recently used entries are evicted beyond this. 0 disables the cache.
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "20000"))
+# A hit only rewrites last_used_at when it is older than this (seconds), so most reads stay read-only
+AI_CACHE_TOUCH_INTERVAL = int(os.getenv("AI_CACHE_TOUCH_INTERVAL", "3600"))
+# The size limit is enforced once every this many writes (per process) instead of counting on every write
+AI_CACHE_EVICT_EVERY = max(1, int(os.getenv("AI_CACHE_EVICT_EVERY", "100")))
+
+static_dir = os.getenv("STATIC_DIR", "static")
+if not os.path.isabs(static_dir):
+    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), static_dir)
+
+# Binary results (TTS audio) are stored as files, the table only keeps their name.
+# Kept next to (not inside) STATIC_DIR, which is served publicly under /static.
+BLOB_DIR = os.getenv("AI_CACHE_DIR") or os.path.join(os.path.dirname(static_dir), "ai_cache")
+
+_writes = 0
+_writes_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so re-crawled paragraphs with different spacing share one entry."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def cache_key(task: str, model: str, prompt_version: int, text: str, level: str = "") -> str:
+    text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    raw = f"{task}|{model}|{prompt_version}|{level or ''}|{text_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _lookup(key: str) -> Optional[str]:
+    with Session(engine) as session:
+        row = session.exec(
+            select(AIResultCache.payload, AIResultCache.last_used_at).where(AIResultCache.key == key)
+        ).first()
+        if not row:
+            return None
+        payload, last_used_at = row
+        now = datetime.utcnow()
+        if last_used_at < now - timedelta(seconds=AI_CACHE_TOUCH_INTERVAL):
+            # LRU order only needs to be approximate: one write per entry and interval
+            session.execute(update(AIResultCache).where(AIResultCache.key == key).values(last_used_at=now))
+            session.commit()
+        return payload
+
+
+def _store(key: str, task: str, payload: str):
+    with Session(engine) as session:
+        entry = session.get(AIResultCache, key)
+        if entry:
+            entry.payload = payload
+            entry.last_used_at = datetime.utcnow()
+        else:
+            entry = AIResultCache(key=key, task=task, payload=payload)
+        session.add(entry)
+        session.commit()
+
+    global _writes
+    with _writes_lock:
+        _writes += 1
+        due = _writes % AI_CACHE_EVICT_EVERY == 0
+    if due:
+        with Session(engine) as session:
+            _evict(session)
+
+
+def _evict(session: Session):
+    total = session.exec(select(func.count()).select_from(AIResultCache)).one()
+    excess = total - AI_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+
+    victims = session.exec(
+        select(AIResultCache).order_by(AIResultCache.last_used_at).limit(excess)
+    ).all()
+    blob_names = [v.payload for v in victims if v.task == "tts"]
+    session.execute(delete(AIResultCache).where(AIResultCache.key.in_([v.key for v in victims])))
+    session.commit()
+
+    for name in blob_names:
+        try:
+            os.remove(os.path.join(BLOB_DIR, name))
+        except OSError:
+            pass
+    logger.info(f"AI 缓存已淘汰 {len(victims)} 条记录")
+
+
+def get(task: str, model: str, prompt_version: int, text: str, level: str = "") -> Optional[Any]:
+    """Returns the cached JSON result, or None on a miss. Cache errors never break the caller."""
+    if AI_CACHE_MAX_ENTRIES <= 0:
+        return None
+    try:
+        payload = _lookup(cache_key(task, model, prompt_version, text, level))
+        return json.loads(payload) if payload is not None else None
+    except Exception as e:
+        logger.warning(f"AI 缓存读取失败: {e}")
+        return None
+
+
+def put(task: str, model: str, prompt_version: int, text: str, result: Any, level: str = ""):
+    if AI_CACHE_MAX_ENTRIES <= 0:
+        return
+    try:
+        _store(cache_key(task, model, prompt_version, text, level), task, json.dumps(result, ensure_ascii=False))
+    except Exception as e:
+        logger.warning(f"AI 缓存写入失败: {e}")
+
+
+def get_bytes(task: str, model: str, prompt_version: int, text: str) -> Optional[bytes]:
+    if AI_CACHE_MAX_ENTRIES <= 0:
+        return None
+    try:
+        name = _lookup(cache_key(task, model, prompt_version, text))
+        if name is None:
+            return None
+        with open(os.path.join(BLOB_DIR, name), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"AI 缓存读取失败: {e}")
+        return None
+
+
+def put_bytes(task: str, model: str, prompt_version: int, text: str, data: bytes):
+    if AI_CACHE_MAX_ENTRIES <= 0:
+        return
+    try:
+        key = cache_key(task, model, prompt_version, text)
+        name = f"{key}.bin"
+        write_atomic(os.path.join(BLOB_DIR, name), data)
+        _store(key, task, name)
+    except Exception as e:
+        logger.warning(f"AI 缓存写入失败: {e}")
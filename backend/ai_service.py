@@ -1,5 +1,6 @@
 import os
 import re
+from typing import Callable, List
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,7 +11,12 @@ from http import HTTPStatus
 import dashscope
 from dashscope import Generation, MultiModalConversation
 from models import DifficultyLevel
-import requests
+from throttle import ModelThrottle
+from audio_concat import concat_audio
+from concurrent.futures import ThreadPoolExecutor
+import ai_cache
+from http_client import get_http_session
+from llm_json import JsonArrayStream, parse_llm_json
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,16 +24,105 @@ logger = logging.getLogger(__name__)
 # Ensure API key is set
 dashscope.api_key = os.getenv("DASHSCOPE_API_KEY")
 
+LLM_MODEL = "qwen3.5-flash"
+TTS_MODEL = "qwen3-tts-instruct-flash"
+
+# Per-model in-flight limit and start rate (calls/second), shared by every caller in this process
+MODEL_THROTTLES = {
+    LLM_MODEL: ModelThrottle(
+        max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+        rate=float(os.getenv("LLM_RATE_PER_SECOND", "4")),
+    ),
+    TTS_MODEL: ModelThrottle(
+        max_in_flight=int(os.getenv("TTS_MAX_IN_FLIGHT", "4")),
+        rate=float(os.getenv("TTS_RATE_PER_SECOND", "2")),
+    ),
+}
+
+# Max chunks of one long paragraph synthesized at the same time (still bounded by the TTS throttle)
+TTS_CHUNK_CONCURRENCY = int(os.getenv("TTS_CHUNK_CONCURRENCY", "4"))
+
+# Part of the AI cache key. Bump a task's version whenever its prompt or output format changes.
+PROMPT_VERSIONS = {
+    "vocabulary": 1,
+    "translation": 1,
+    "syntax": 1,
+    "tts": 1,
+}
+
+# Follow-up requests for the missing tail of a truncated vocabulary answer
+VOCAB_TAIL_RETRIES = int(os.getenv("VOCAB_TAIL_RETRIES", "2"))
+
+VOCAB_TOKEN_TYPES = ("normal", "attention", "punctuation")
+
+
+def _valid_tokens(tokens) -> list:
+    """Normalizes the longest valid prefix of a vocabulary token list; the first malformed token ends it."""
+    valid = []
+    for t in tokens if isinstance(tokens, list) else []:
+        if not isinstance(t, dict) or not isinstance(t.get("text"), str) or t.get("type") not in VOCAB_TOKEN_TYPES:
+            break
+        group_id = t.get("group_id")
+        valid.append({
+            "text": t["text"],
+            "type": t["type"],
+            "definition": t.get("definition") or "",
+            "context_meaning": t.get("context_meaning") or "",
+            "group_id": group_id if isinstance(group_id, int) and not isinstance(group_id, bool) else None,
+        })
+    return valid
+
+
+def _valid_translation(result):
+    """Returns the normalized translation object, or None if it carries no translation."""
+    if not isinstance(result, dict) or not isinstance(result.get("translation"), str) or not result["translation"].strip():
+        return None
+    phrases = result.get("key_phrases")
+    return {
+        **result,
+        "style": result.get("style") or "",
+        "key_phrases": [p for p in phrases if isinstance(p, dict) and p.get("en") and p.get("cn")] if isinstance(phrases, list) else [],
+    }
+
+
+def _valid_syntax(result):
+    """Returns the normalized syntax object, or None if it has no structures list."""
+    if not isinstance(result, dict) or not isinstance(result.get("structures"), list):
+        return None
+    return {
+        **result,
+        "clauses": result["clauses"] if isinstance(result.get("clauses"), list) else [],
+        "grammar_points": result["grammar_points"] if isinstance(result.get("grammar_points"), list) else [],
+    }
+
+
+def _covered_offset(text: str, tokens: list) -> int:
+    """Character offset up to which the tokens cover the source text."""
+    pos = 0
+    for t in tokens:
+        word = t["text"].strip()
+        if not word:
+            continue
+        found = text.find(word, pos)
+        # Tokens the model rewrote (e.g. curly quotes) are skipped instead of matched far ahead
+        if found != -1 and found - pos <= 40:
+            pos = found + len(word)
+    return pos
+
+
+def _plain_tokens(text: str) -> list:
+    """Unannotated tokens for text the model never analyzed, so the reader still shows it."""
+    return [
+        {"text": w, "type": "normal" if re.match(r"\w", w) else "punctuation", "definition": "", "context_meaning": "", "group_id": None}
+        for w in re.findall(r"\w[\w'’-]*|[^\w\s]", text)
+    ]
+
+
 class AIService:
 
 
     @staticmethod
-    def analyze_vocabulary(text: str, level: str):
-        """
-        Analyzes the text for vocabulary based on the user's difficulty level.
-        Returns a JSON list of objects representing the full text tokenization.
-        """
-
+    def _vocabulary_messages(text: str, level: str) -> list:
         level_instruction = ""
         if level == DifficultyLevel.INITIAL.value:
             level_instruction = "Target: High School level (CEFR B1)."
@@ -394,35 +489,145 @@ class AIService:
         JSON about the target text:
         """
 
+        return [
+            {'role': 'system', 'content': [{'text': 'You are a strict JSON outputting AI assistant.'}]},
+            {'role': 'user', 'content': [{'text': prompt}]}
+        ]
+
+    @staticmethod
+    def analyze_vocabulary(text: str, level: str):
+        """
+        Analyzes the text for vocabulary based on the user's difficulty level.
+        Returns a JSON list of objects representing the full text tokenization.
+        """
+        cached = ai_cache.get("vocabulary", LLM_MODEL, PROMPT_VERSIONS["vocabulary"], text, level)
+        if cached is not None:
+            return cached
+
+        tokens, complete = AIService._request_vocabulary(text, level)
+        if tokens is None:
+            return []
+        return AIService._complete_vocabulary(text, level, tokens, complete)
+
+    @staticmethod
+    def _request_vocabulary(text: str, level: str):
+        """One vocabulary request. Returns (valid tokens, complete), or (None, False) if the call failed."""
         logger.info(f"正在进行 AI 词汇分析 (长度: {len(text)} 字符)...")
         start_time = time.time()
         try:
-            response = MultiModalConversation.call(
-                model="qwen3.5-flash",
-                messages=[
-                    {'role': 'system', 'content': [{'text': 'You are a strict JSON outputting AI assistant.'}]},
-                    {'role': 'user', 'content': [{'text': prompt}]}
-                ]
-            )
+            with MODEL_THROTTLES[LLM_MODEL]:
+                response = MultiModalConversation.call(
+                    model=LLM_MODEL,
+                    messages=AIService._vocabulary_messages(text, level)
+                )
 
             if response.status_code == HTTPStatus.OK:
-                content = response.output.choices[0].message.content[0]['text'].strip()
-                # Clean markdown code blocks if present
-                if content.startswith("```json"):
-                    content = content[7:]
-                if content.endswith("```"):
-                    content = content[:-3]
+                content = response.output.choices[0].message.content[0]['text']
                 logger.info(f"AI 词汇分析完成，耗时: {time.time() - start_time:.2f}s")
-                return json.loads(content)
+                result, complete = parse_llm_json(content, list)
+                tokens = _valid_tokens(result)
+                return tokens, complete and len(tokens) == len(result)
             else:
                 logger.error(f"AI 词汇分析错误: {response.code} - {response.message}")
-                return []
+                return None, False
         except Exception as e:
             logger.error(f"AI 词汇分析异常: {e}")
-            return []
+            return None, False
+
+    @staticmethod
+    def _complete_vocabulary(text: str, level: str, tokens: list, complete: bool) -> list:
+        """
+        Finishes a vocabulary result. A truncated token list is kept and only the uncovered tail of the text
+        is re-requested (up to VOCAB_TAIL_RETRIES times). Complete results are cached; if the tail still
+        cannot be analyzed it is appended unannotated.
+        """
+        attempts = 0
+        while not complete and attempts < VOCAB_TAIL_RETRIES:
+            attempts += 1
+            tail = text[_covered_offset(text, tokens):]
+            if not tail.strip():
+                complete = True
+                break
+            logger.warning(f"词汇分析结果不完整 (已有 {len(tokens)} 个词)，仅重新请求剩余 {len(tail)} 字符")
+            tail_tokens, complete = AIService._request_vocabulary(tail, level)
+            if tail_tokens is None:
+                break
+            # Continue the group numbering of the prefix
+            group_base = max((t["group_id"] for t in tokens if t["group_id"] is not None), default=0)
+            tokens = tokens + [
+                {**t, "group_id": t["group_id"] + group_base if t["group_id"] is not None else None}
+                for t in tail_tokens
+            ]
+
+        if complete:
+            if tokens:
+                ai_cache.put("vocabulary", LLM_MODEL, PROMPT_VERSIONS["vocabulary"], text, tokens, level)
+            return tokens
+
+        rest = text[_covered_offset(text, tokens):]
+        logger.error(f"词汇分析结果仍不完整，剩余 {len(rest)} 字符不做标注")
+        return tokens + _plain_tokens(rest)
+
+    @staticmethod
+    def analyze_vocabulary_stream(text: str, level: str, on_token: Callable[[dict], None]) -> list:
+        """
+        Streaming version of analyze_vocabulary: on_token receives the token objects one by one while the model is
+        still generating, and the full list is returned. on_token runs while the model's throttle slot is held,
+        so it must only hand the token off (never wait on a reader).
+        If the stream breaks off after some tokens, the missing tail is completed like in analyze_vocabulary.
+        """
+        cached = ai_cache.get("vocabulary", LLM_MODEL, PROMPT_VERSIONS["vocabulary"], text, level)
+        if cached is not None:
+            for token in cached:
+                on_token(token)
+            return cached
+
+        logger.info(f"正在进行流式 AI 词汇分析 (长度: {len(text)} 字符)...")
+        start_time = time.time()
+        parser = JsonArrayStream()
+        tokens = []
+        try:
+            with MODEL_THROTTLES[LLM_MODEL]:
+                responses = MultiModalConversation.call(
+                    model=LLM_MODEL,
+                    messages=AIService._vocabulary_messages(text, level),
+                    stream=True,
+                    incremental_output=True
+                )
+                for response in responses:
+                    if response.status_code != HTTPStatus.OK:
+                        raise RuntimeError(f"{response.code} - {response.message}")
+                    if not response.output or not response.output.choices:
+                        continue
+                    for part in response.output.choices[0].message.content or []:
+                        for token in parser.feed(part.get('text', '')):
+                            valid = _valid_tokens([token])
+                            if not valid:
+                                raise ValueError(f"无效的词汇标注: {token}")
+                            if not tokens:
+                                logger.info(f"首个词汇标注耗时: {time.time() - start_time:.2f}s")
+                            tokens.append(valid[0])
+                            on_token(valid[0])
+            complete = parser.complete
+        except Exception as e:
+            if not tokens:
+                raise
+            logger.error(f"流式 AI 词汇分析中断 (已解析 {len(tokens)} 个词): {e}")
+            complete = False
+
+        logger.info(f"流式 AI 词汇分析结束，耗时: {time.time() - start_time:.2f}s")
+        streamed = len(tokens)
+        result = AIService._complete_vocabulary(text, level, tokens, complete)
+        for token in result[streamed:]:
+            on_token(token)
+        return result
 
     @staticmethod
     def translate_paragraph(text: str):
+        cached = ai_cache.get("translation", LLM_MODEL, PROMPT_VERSIONS["translation"], text)
+        if cached is not None:
+            return cached
+
         prompt = f"""
         Translate the following English paragraph into fluent, formal Chinese.
         Output MUST be a valid JSON object with the following structure:
@@ -441,19 +646,24 @@ class AIService:
         logger.info(f"正在进行 AI 翻译 (长度: {len(text)} 字符)...")
         start_time = time.time()
         try:
-            response = MultiModalConversation.call(
-                model="qwen3.5-flash",
-                messages=[
-                    {'role': 'system', 'content': [{'text': 'You are a professional translator. Output only JSON.'}]},
-                    {'role': 'user', 'content': [{'text': prompt}]}
-                ]
-            )
+            with MODEL_THROTTLES[LLM_MODEL]:
+                response = MultiModalConversation.call(
+                    model=LLM_MODEL,
+                    messages=[
+                        {'role': 'system', 'content': [{'text': 'You are a professional translator. Output only JSON.'}]},
+                        {'role': 'user', 'content': [{'text': prompt}]}
+                    ]
+                )
             if response.status_code == HTTPStatus.OK:
-                content = response.output.choices[0].message.content[0]['text'].strip()
-                if content.startswith("```json"): content = content[7:]
-                if content.endswith("```"): content = content[:-3]
+                content = response.output.choices[0].message.content[0]['text']
                 logger.info(f"AI 翻译完成，耗时: {time.time() - start_time:.2f}s")
-                return json.loads(content)
+                parsed, complete = parse_llm_json(content, dict)
+                result = _valid_translation(parsed) if complete else None
+                if result is None:
+                    logger.error("AI 翻译结果不完整或缺少 translation 字段")
+                    return {"translation": "Translation failed."}
+                ai_cache.put("translation", LLM_MODEL, PROMPT_VERSIONS["translation"], text, result)
+                return result
             else:
                 logger.error(f"AI 翻译错误: {response.code} - {response.message}")
                 return {"translation": "Translation failed."}
@@ -463,6 +673,10 @@ class AIService:
 
     @staticmethod
     def analyze_syntax(text: str):
+        cached = ai_cache.get("syntax", LLM_MODEL, PROMPT_VERSIONS["syntax"], text)
+        if cached is not None:
+            return cached
+
         prompt = f"""
         Analyze the syntax of the following English paragraph for an English learner.
         Output MUST be a valid JSON object with the following structure:
@@ -488,18 +702,23 @@ class AIService:
         {text}
         """
         try:
-            response = MultiModalConversation.call(
-                model="qwen3.5-flash",
-                messages=[
-                    {'role': 'system', 'content': [{'text': 'You are a grammar expert. Output only JSON.'}]},
-                    {'role': 'user', 'content': [{'text': prompt}]}
-                ]
-            )
+            with MODEL_THROTTLES[LLM_MODEL]:
+                response = MultiModalConversation.call(
+                    model=LLM_MODEL,
+                    messages=[
+                        {'role': 'system', 'content': [{'text': 'You are a grammar expert. Output only JSON.'}]},
+                        {'role': 'user', 'content': [{'text': prompt}]}
+                    ]
+                )
             if response.status_code == HTTPStatus.OK:
-                content = response.output.choices[0].message.content[0]['text'].strip()
-                if content.startswith("```json"): content = content[7:]
-                if content.endswith("```"): content = content[:-3]
-                return json.loads(content)
+                content = response.output.choices[0].message.content[0]['text']
+                parsed, complete = parse_llm_json(content, dict)
+                result = _valid_syntax(parsed) if complete else None
+                if result is None:
+                    logger.error("AI 句法分析结果不完整或缺少 structures 字段")
+                    return {"error": "Analysis failed."}
+                ai_cache.put("syntax", LLM_MODEL, PROMPT_VERSIONS["syntax"], text, result)
+                return result
             else:
                 logger.error(f"AI 句法分析错误: {response.code} - {response.message}")
                 return {"error": "Analysis failed."}
@@ -507,6 +726,116 @@ class AIService:
             logger.error(f"句法分析异常: {e}")
             return {"error": "Analysis error."}
 
+    @staticmethod
+    def _batched(task: str, texts: List[str], build_prompt, system_text: str, validate, single_fn) -> list:
+        """
+        Runs one LLM request for several paragraphs. The paragraphs are sent as a JSON object
+        keyed "p1".."pN" and the model answers with an object using the same keys.
+        Cached paragraphs are not sent; any paragraph missing or invalid in the answer falls back to single_fn.
+        """
+        results = [ai_cache.get(task, LLM_MODEL, PROMPT_VERSIONS[task], t) for t in texts]
+        missing = [i for i, r in enumerate(results) if r is None]
+
+        if len(missing) > 1:
+            keyed = {f"p{n + 1}": texts[i] for n, i in enumerate(missing)}
+            logger.info(f"正在进行批量 AI {task} ({len(keyed)} 段, 共 {sum(len(t) for t in keyed.values())} 字符)...")
+            start_time = time.time()
+            try:
+                with MODEL_THROTTLES[LLM_MODEL]:
+                    response = MultiModalConversation.call(
+                        model=LLM_MODEL,
+                        messages=[
+                            {'role': 'system', 'content': [{'text': system_text}]},
+                            {'role': 'user', 'content': [{'text': build_prompt(json.dumps(keyed, ensure_ascii=False, indent=2))}]}
+                        ]
+                    )
+                if response.status_code == HTTPStatus.OK:
+                    content = response.output.choices[0].message.content[0]['text']
+                    # A truncated batch still yields the paragraphs that were completed, but is never cached
+                    batch, complete = parse_llm_json(content, dict)
+                    for n, i in enumerate(missing):
+                        item = validate(batch.get(f"p{n + 1}"))
+                        if item is not None:
+                            results[i] = item
+                            if complete:
+                                ai_cache.put(task, LLM_MODEL, PROMPT_VERSIONS[task], texts[i], item)
+                    logger.info(f"批量 AI {task} 完成，耗时: {time.time() - start_time:.2f}s")
+                else:
+                    logger.error(f"批量 AI {task} 错误: {response.code} - {response.message}")
+            except Exception as e:
+                logger.error(f"批量 AI {task} 异常: {e}")
+
+        # Per-item fallback (also covers batches of a single uncached paragraph)
+        for i, r in enumerate(results):
+            if r is None:
+                results[i] = single_fn(texts[i])
+        return results
+
+    @staticmethod
+    def translate_paragraphs(texts: List[str]) -> list:
+        """Batched translate_paragraph: returns one result per input text, in order."""
+        def build_prompt(paragraphs_json):
+            return f"""
+        Translate each of the following English paragraphs into fluent, formal Chinese.
+        The paragraphs are given as a JSON object mapping an id to the paragraph text.
+        Output MUST be a valid JSON object with EXACTLY the same ids as keys, where each value has the following structure:
+        {{
+            "translation": "formal chinese translation",
+            "style": "description of the writing style (e.g. academic, conversational, poetic)",
+            "key_phrases": [
+                {{"en": "phrase", "cn": "chinese equivalent"}}
+            ]
+        }}
+        Translate every paragraph on its own. Do not output markdown or explanations outside the JSON.
+
+        Paragraphs:
+        {paragraphs_json}
+        """
+
+        return AIService._batched(
+            "translation", texts, build_prompt,
+            'You are a professional translator. Output only JSON.',
+            _valid_translation,
+            AIService.translate_paragraph,
+        )
+
+    @staticmethod
+    def analyze_syntax_batch(texts: List[str]) -> list:
+        """Batched analyze_syntax: returns one result per input text, in order."""
+        def build_prompt(paragraphs_json):
+            return f"""
+        Analyze the syntax of each of the following English paragraphs for an English learner.
+        The paragraphs are given as a JSON object mapping an id to the paragraph text.
+        Output MUST be a valid JSON object with EXACTLY the same ids as keys, where each value has the following structure:
+        {{
+            "structures": [
+                {{"pattern": "S-V-VO (主谓宾)", "content": "example from text", "explanation": "chinese explanation"}}
+            ],
+            "clauses": [
+                {{"type": "Relative clause (定语从句)", "content": "...", "explanation": "..."}}
+            ],
+            "grammar_points": [
+                {{"point": "Present Perfect", "point_cn": "现在完成时", "explanation": "Explain how it IS USED in this specific text. DO NOT include if not present."}}
+            ]
+        }}
+        
+        CRITICAL RULES:
+        1. Analyze every paragraph on its own; examples and explanations must come from THAT paragraph.
+        2. ONLY include grammar_points that are ACTUALLY USED in the paragraph.
+        3. If a grammar point is not clearly present, DO NOT include it.
+        4. Do not output markdown or explanations outside the JSON.
+
+        Paragraphs:
+        {paragraphs_json}
+        """
+
+        return AIService._batched(
+            "syntax", texts, build_prompt,
+            'You are a grammar expert. Output only JSON.',
+            _valid_syntax,
+            AIService.analyze_syntax,
+        )
+
     @staticmethod
     def _split_text(text: str, max_len: int = 500) -> list:
         """
@@ -540,64 +869,72 @@ class AIService:
             chunks.append(current_chunk.strip())
         return chunks
 
+    @staticmethod
+    def _synthesize_chunk(chunk: str, index: int):
+        """Synthesizes one text chunk and downloads the audio. Returns None on any failure."""
+        try:
+            # Using the correct SDK class as per user instructions
+            with MODEL_THROTTLES[TTS_MODEL]:
+                response = dashscope.MultiModalConversation.call(
+                    model=TTS_MODEL,
+                    text=chunk,
+                    voice='Cherry',
+                    api_key=os.getenv("DASHSCOPE_API_KEY"),
+                    language_type="English",
+                    instruction="Standard English pronunciation, clear and at a moderate speed, suitable for English pronunciation practice."
+                )
+
+            # Check successful response
+            if response.status_code != HTTPStatus.OK:
+                logger.error(f"TTS API 错误 (段 {index+1}): {response.code} - {response.message}")
+                return None
+
+            # Structure: response.output['audio']['url']
+            if not (hasattr(response, 'output') and response.output and 'audio' in response.output and 'url' in response.output['audio']):
+                logger.error(f"TTS 响应缺少音频 URL (段 {index+1}): {response}")
+                return None
+
+            # Download the audio
+            r = get_http_session().get(response.output['audio']['url'])
+            if r.status_code != 200:
+                logger.error(f"TTS 下载错误 (段 {index+1}): {r.status_code}")
+                return None
+            return r.content
+
+        except Exception as e:
+            logger.error(f"TTS 异常 (段 {index+1}): {e}")
+            return None
+
     @staticmethod
     def generate_tts(text: str) -> bytes:
         """
         Generates TTS audio using Qwen3-TTS with text splitting.
-        Returns the audio content (bytes) directly (MP3 format).
+        Chunks are synthesized concurrently and joined into a single audio stream.
+        Returns the audio content (bytes) directly.
         """
         if not text:
             return None
 
+        cached = ai_cache.get_bytes("tts", TTS_MODEL, PROMPT_VERSIONS["tts"], text)
+        if cached:
+            return cached
+
         # 限制设为 500，留出 100 字符的余量应对特殊字符
         chunks = AIService._split_text(text, max_len=500)
-        all_audio_bytes = b""
-        
-        if len(chunks) > 1:
-            logger.info(f"TTS 请求文本过长 ({len(text)} 字符), 将分为 {len(chunks)} 段处理")
-        
-        for i, chunk in enumerate(chunks):
-            try:
-                # Using the correct SDK class as per user instructions
-                response = dashscope.MultiModalConversation.call(
-                    model='qwen3-tts-instruct-flash',
-                    text=chunk,
-                    voice='Cherry',
-                    api_key=os.getenv("DASHSCOPE_API_KEY"),
-                    language_type="English",
-                    instruction="Standard English pronunciation, clear and at a moderate speed, suitable for English pronunciation practice."
-                )
 
-                # Check successful response
-                if response.status_code == HTTPStatus.OK:
-                    # Structure: response.output['audio']['url']
-                    if hasattr(response, 'output') and response.output and 'audio' in response.output and 'url' in response.output['audio']:
-                        audio_url = response.output['audio']['url']
-                        # Download the audio
-                        r = requests.get(audio_url)
-                        if r.status_code == 200:
-                            all_audio_bytes += r.content
-                            if len(chunks) > 1:
-                                logger.info(f"  - TTS 第 {i+1} 段处理完成")
-                        else:
-                            logger.error(f"TTS 下载错误 (段 {i+1}): {r.status_code}")
-                            # 如果是分段中失败，返回已有部分可能导致杂音，在此选择中断
-                            return None
-                    else:
-                        logger.error(f"TTS 响应缺少音频 URL (段 {i+1}): {response}")
-                        return None
-                else:
-                    logger.error(f"TTS API 错误 (段 {i+1}): {response.code} - {response.message}")
-                    return None
-                
-                # 如果分段处理，稍微小睡一下，避免触发并发限制
-                if len(chunks) > 1:
-                    time.sleep(0.1)
+        if len(chunks) == 1:
+            parts = [AIService._synthesize_chunk(chunks[0], 0)]
+        else:
+            logger.info(f"TTS 请求文本过长 ({len(text)} 字符), 将分为 {len(chunks)} 段并发处理")
+            with ThreadPoolExecutor(max_workers=min(len(chunks), TTS_CHUNK_CONCURRENCY)) as executor:
+                parts = list(executor.map(AIService._synthesize_chunk, chunks, range(len(chunks))))
 
-            except Exception as e:
-                logger.error(f"TTS 异常 (段 {i+1}): {e}")
-                return None
-                
+        # 如果是分段中失败，返回已有部分可能导致杂音，在此选择中断
+        if not all(parts):
+            return None
+
+        all_audio_bytes = concat_audio(parts)
+        ai_cache.put_bytes("tts", TTS_MODEL, PROMPT_VERSIONS["tts"], text, all_audio_bytes)
         return all_audio_bytes
 
 # Fix for SpeechSynthesizer import
@@ -0,0 +1,103 @@
+import json
+from typing import Optional
+
+from sqlalchemy.types import Text, TypeDecorator
+
+# Keys of one vocabulary token (see ai_service._valid_tokens) and their column in the compact form
+TOKEN_COLUMNS = (("text", "w"), ("definition", "d"), ("context_meaning", "m"))
+TOKEN_KEYS = {"text", "type", "definition", "context_meaning", "group_id"}
+COMPACT_VERSION = 1
+
+
+def encode_compact(tokens: list) -> Optional[dict]:
+    """
+    Struct-of-arrays form of a token list: every string is stored once in the "s" table and tokens refer
+    to it by index, token types are indexes into "k". Returns None if a token does not fit the schema.
+
+        {"v": 1, "s": ["", "word", ...], "k": ["normal", ...],
+         "t": [type idx], "w": [text idx], "d": [definition idx], "m": [context_meaning idx], "g": [group_id]}
+    """
+    strings = {"": 0}
+    types = {}
+    columns = {"t": [], "w": [], "d": [], "m": [], "g": []}
+    for token in tokens:
+        if not isinstance(token, dict) or not token.keys() <= TOKEN_KEYS:
+            return None
+        for key, column in TOKEN_COLUMNS:
+            value = token.get(key) or ""
+            if not isinstance(value, str):
+                return None
+            columns[column].append(strings.setdefault(value, len(strings)))
+        token_type = token.get("type")
+        if not isinstance(token_type, str):
+            return None
+        columns["t"].append(types.setdefault(token_type, len(types)))
+        group_id = token.get("group_id")
+        if group_id is not None and (not isinstance(group_id, int) or isinstance(group_id, bool)):
+            return None
+        columns["g"].append(group_id)
+
+    if all(g is None for g in columns["g"]):
+        del columns["g"]
+    return {"v": COMPACT_VERSION, "s": list(strings), "k": list(types), **columns}
+
+
+def decode_compact(data: dict) -> list:
+    strings, types = data["s"], data["k"]
+    group_ids = data.get("g") or [None] * len(data["t"])
+    return [
+        {
+            "text": strings[w],
+            "type": types[t],
+            "definition": strings[d],
+            "context_meaning": strings[m],
+            "group_id": g,
+        }
+        for t, w, d, m, g in zip(data["t"], data["w"], data["d"], data["m"], group_ids)
+    ]
+
+
+def dumps_analysis(tokens: list) -> str:
+    """Stored form: compact JSON, or the plain token array for tokens outside the schema."""
+    compact = encode_compact(tokens)
+    return json.dumps(compact if compact is not None else tokens, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads_analysis(stored: str) -> list:
+    """Reads both the compact form and plain JSON token arrays (rows written before the compact format)."""
+    value = json.loads(stored)
+    return decode_compact(value) if isinstance(value, dict) else value
+
+
+class CompactAnalysis(TypeDecorator):
+    """
+    Column type for ParagraphPayload.analysis: Python code sees the token list, the database stores the compact form.
+    JSON text is accepted on write too.
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = loads_analysis(value)
+        return dumps_analysis(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return loads_analysis(value)
+
+
+def analysis_for_output(stored: Optional[str], compact: bool = False):
+    """
+    API form of a stored analysis (raw column text, see PAGE_COLUMNS): the token list, or with compact
+    the compact object, which is sent as stored without rebuilding the tokens.
+    """
+    if not stored:
+        return []
+    value = json.loads(stored)
+    if compact:
+        return value if isinstance(value, dict) else (encode_compact(value) or value)
+    return decode_compact(value) if isinstance(value, dict) else value
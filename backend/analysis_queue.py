@@ -0,0 +1,130 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlmodel import Session
+from database import engine
+from models import Paragraph, Article
+from ai_service import AIService
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisQueue:
+    """
+    Background vocabulary analysis for paragraphs requested by readers.
+    Each paragraph is queued at most once at a time; results are written with the worker's own Session.
+    Tokens are published while the model streams them, so readers can follow a running analysis via stream().
+    """
+
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self._pending = set()
+        self._partial = {}  # paragraph_id -> tokens streamed so far
+        self._lock = threading.Lock()
+        self._async_waiters = set()  # (event loop, asyncio.Event) of running stream() calls
+
+    def submit(self, paragraph_id: int) -> bool:
+        """Queues a paragraph. Returns False if it is already queued or running."""
+        with self._lock:
+            if paragraph_id in self._pending:
+                return False
+            self._pending.add(paragraph_id)
+        self._executor.submit(self._run, paragraph_id)
+        return True
+
+    def is_pending(self, paragraph_id: int) -> bool:
+        with self._lock:
+            return paragraph_id in self._pending
+
+    def _run(self, paragraph_id: int):
+        try:
+            with Session(engine) as session:
+                p = session.get(Paragraph, paragraph_id)
+                if not p or p.analysis or not p.content.strip():
+                    return
+                article = session.get(Article, p.article_id)
+                # Use article difficulty or default
+                level = article.difficulty.value if article and article.difficulty else "Initial"
+
+                tokens = []
+                with self._lock:
+                    self._partial[paragraph_id] = tokens
+
+                def publish(token):
+                    with self._lock:
+                        tokens.append(token)
+                        self._notify()
+
+                AIService.analyze_vocabulary_stream(p.content, level, publish)
+
+                if tokens:
+                    p.analysis = tokens
+                    session.add(p)
+                    session.commit()
+                else:
+                    logger.error(f"段落 {paragraph_id} 的分析格式无效")
+        except Exception as e:
+            logger.error(f"段落 {paragraph_id} 后台分析失败: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(paragraph_id)
+                self._partial.pop(paragraph_id, None)
+                self._notify()
+
+    def _notify(self):
+        """Wakes the stream() readers. Called with self._lock held, from worker threads."""
+        for loop, wakeup in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    async def stream(self, paragraph_ids, timeout: float = 120):
+        """
+        Yields (paragraph_id, index, token) for the given paragraphs as their tokens are generated,
+        until none of them is queued or running any more (or timeout seconds passed).
+        Waits on the event loop, so open SSE connections do not hold threadpool threads.
+        """
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        waiter = (loop, wakeup)
+        sent = {pid: 0 for pid in paragraph_ids}
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                # Cleared before looking, so a notify that arrives meanwhile is not lost
+                wakeup.clear()
+                with self._lock:
+                    ready = []
+                    for pid, count in sent.items():
+                        tokens = self._partial.get(pid)
+                        if tokens and len(tokens) > count:
+                            ready.append((pid, count, tokens[count:]))
+                            sent[pid] = len(tokens)
+                    active = any(pid in self._pending for pid in sent)
+
+                if not ready:
+                    remaining = deadline - time.monotonic()
+                    if not active or remaining <= 0:
+                        return
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                for pid, start, new_tokens in ready:
+                    for offset, token in enumerate(new_tokens):
+                        yield pid, start + offset, token
+        finally:
+            with self._lock:
+                self._async_waiters.discard(waiter)
+
+
+analysis_queue = AnalysisQueue(workers=int(os.getenv("ANALYSIS_QUEUE_WORKERS", "4")))
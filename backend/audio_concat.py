@@ -0,0 +1,147 @@
+import io
+import wave
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bitrate tables (kbps) indexed by [version_group][layer][bitrate_index]
+# version_group: 0 = MPEG-1, 1 = MPEG-2 / MPEG-2.5
+_BITRATES = {
+    (0, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (0, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (0, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (1, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (1, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (1, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates (Hz) indexed by version bits then sample rate index
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+def _parse_frame_header(data: bytes, pos: int) -> Optional[dict]:
+    """Parses the 4-byte MPEG audio frame header at pos. Returns None if it is not a valid header."""
+    if pos + 4 > len(data):
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    channel_mode = (b3 >> 6) & 0x03
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    layer = 4 - layer_bits
+    version_group = 0 if version_bits == 3 else 1
+    bitrate = _BITRATES[(version_group, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version_group == 1:
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        length = 144 * bitrate // sample_rate + padding
+
+    return {
+        "length": length,
+        "mpeg1": version_group == 0,
+        "mono": channel_mode == 3,
+    }
+
+
+def _is_info_frame(data: bytes, pos: int, header: dict) -> bool:
+    """Detects the Xing/Info/VBRI metadata frame encoders put first. Its frame count would be wrong after joining."""
+    if header["mpeg1"]:
+        side_info = 17 if header["mono"] else 32
+    else:
+        side_info = 9 if header["mono"] else 17
+    tag = data[pos + 4 + side_info: pos + 8 + side_info]
+    return tag in (b"Xing", b"Info") or data[pos + 36: pos + 40] == b"VBRI"
+
+
+def _strip_tags(data: bytes) -> bytes:
+    # ID3v2 at the start: 10-byte header with a syncsafe size (+10 if a footer is present)
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        if data[5] & 0x10:
+            size += 10
+        data = data[10 + size:]
+    # ID3v1 at the end: fixed 128 bytes starting with "TAG"
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def mp3_frames(data: bytes) -> List[bytes]:
+    """Splits an MP3 byte string into its audio frames, dropping tags, metadata frames and junk between frames."""
+    data = _strip_tags(data)
+    frames = []
+    pos = 0
+    while pos < len(data):
+        header = _parse_frame_header(data, pos)
+        if not header or header["length"] <= 4 or pos + header["length"] > len(data):
+            # Resync on the next possible frame start
+            next_pos = data.find(b"\xff", pos + 1)
+            if next_pos == -1:
+                break
+            pos = next_pos
+            continue
+        if frames or not _is_info_frame(data, pos, header):
+            frames.append(data[pos:pos + header["length"]])
+        pos += header["length"]
+    return frames
+
+
+def _concat_wav(parts: List[bytes]) -> bytes:
+    params = None
+    frames = []
+    for part in parts:
+        with wave.open(io.BytesIO(part), "rb") as w:
+            part_params = (w.getnchannels(), w.getsampwidth(), w.getframerate())
+            if params is None:
+                params = part_params
+            elif part_params != params:
+                raise ValueError(f"WAV format mismatch: {part_params} != {params}")
+            frames.append(w.readframes(w.getnframes()))
+
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(params[0])
+        w.setsampwidth(params[1])
+        w.setframerate(params[2])
+        w.writeframes(b"".join(frames))
+    return out.getvalue()
+
+
+def concat_audio(parts: List[bytes]) -> bytes:
+    """
+    Joins synthesized audio chunks into one valid stream in a single pass.
+    WAV chunks are merged under one RIFF header; MP3 chunks are joined frame by frame,
+    without the per-chunk ID3 tags and Xing/Info headers that break seeking.
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    if all(p[:4] == b"RIFF" and p[8:12] == b"WAVE" for p in parts):
+        return _concat_wav(parts)
+
+    frames = []
+    for part in parts:
+        part_frames = mp3_frames(part)
+        if not part_frames:
+            logger.warning("音频分段无法按 MP3 帧解析，按原始字节拼接")
+            part_frames = [part]
+        frames.extend(part_frames)
+    return b"".join(frames)
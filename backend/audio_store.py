@@ -0,0 +1,97 @@
+import os
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+static_dir = os.getenv("STATIC_DIR", "static")
+if not os.path.isabs(static_dir):
+    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), static_dir)
+
+AUDIO_DIR = os.path.join(static_dir, "audio")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one: the first caller runs fn,
+    the others block and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn: Callable):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+_audio_flight = SingleFlight()
+
+
+def paragraph_audio_paths(article_id: int, order_index: int):
+    """
+    Naming convention: static/audio/{article_id}/{article_id}_{order_index}.mp3
+    Returns (absolute path on disk, relative path stored in Paragraph.audio_path).
+    """
+    filename = f"{article_id}_{order_index}.mp3"
+    abs_path = os.path.join(AUDIO_DIR, str(article_id), filename)
+    rel_path = f"static/audio/{article_id}/{filename}"
+    return abs_path, rel_path
+
+
+def write_atomic(path: str, data: bytes):
+    """Writes to a temp file in the same directory and renames it over the target, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def ensure_paragraph_audio(article_id: int, order_index: int, content: str, generate: Callable[[str], Optional[bytes]]) -> Optional[str]:
+    """
+    Returns the absolute path of the paragraph's audio, generating it first if missing.
+    Concurrent requests for the same paragraph share a single generate() call.
+    Returns None if generation produced no audio.
+    """
+    abs_path, _ = paragraph_audio_paths(article_id, order_index)
+    if os.path.exists(abs_path):
+        return abs_path
+
+    def _generate():
+        # Another flight may have finished between the check above and acquiring leadership
+        if os.path.exists(abs_path):
+            return abs_path
+        audio_bytes = generate(content)
+        if not audio_bytes:
+            return None
+        write_atomic(abs_path, audio_bytes)
+        return abs_path
+
+    return _audio_flight.do(abs_path, _generate)
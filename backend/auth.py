@@ -4,10 +4,14 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import Session
-from database import get_session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from database import get_async_session
 from models import User
 import os
+import time
+from collections import OrderedDict
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-super-secure")
 ALGORITHM = "HS256"
@@ -16,6 +20,18 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 3000
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Seconds a resolved user is reused for requests with the same token subject (0 disables the cache)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+# Users kept in the cache; the least recently used one is dropped beyond this
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+# Per process, so a cached user may be up to USER_CACHE_TTL seconds behind writes made by other processes:
+# endpoints that write to the user row refresh it first.
+_user_cache = OrderedDict()  # token subject (email) -> (expires_at, user column values)
+
+def invalidate_cached_user(email: str):
+    """Drops the cached user; call after changing the user's row."""
+    _user_cache.pop(email, None)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -32,7 +48,30 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+async def _load_user(session: AsyncSession, email: str, user_id: Optional[int]) -> Optional[User]:
+    cached = _user_cache.get(email)
+    if cached and cached[0] > time.monotonic():
+        _user_cache.move_to_end(email)
+        # Attach a copy to this request's session without a query, so endpoints can still modify and commit it
+        user = User(**cached[1])
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    if user_id is not None:
+        # Tokens issued with a "uid" claim are resolved by primary key
+        user = await session.get(User, user_id)
+        if user is not None and user.email != email:
+            user = None
+    else:
+        user = (await session.exec(select(User).where(User.email == email))).first()
+    if user is not None and USER_CACHE_TTL > 0:
+        _user_cache[email] = (time.monotonic() + USER_CACHE_TTL, user.model_dump())
+        _user_cache.move_to_end(email)
+        while len(_user_cache) > USER_CACHE_MAX_ENTRIES:
+            _user_cache.popitem(last=False)
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -41,6 +80,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
+        user_id = payload.get("uid")
         if email is None:
             print(f"Auth failure: No sub in payload: {payload}")
             raise credentials_exception
@@ -48,7 +88,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
         print(f"Auth failure: JWT Error: {e}")
         raise credentials_exception
 
-    user = session.query(User).filter(User.email == email).first()
+    user = await _load_user(session, email, user_id)
     if user is None:
         print(f"Auth failure: User not found for email: {email}")
         raise credentials_exception
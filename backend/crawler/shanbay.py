@@ -1,10 +1,10 @@
-import requests
 import re
 import json
 import time
+import asyncio
+import aiohttp
 import os
 import sys
-import shutil
 import logging
 from datetime import datetime, timedelta, timezone
 
@@ -16,18 +16,14 @@ if __name__ == "__main__":
 
 from sqlmodel import Session, select
 from database import engine
+from http_client import get_http_session, HTTP_TIMEOUT
 from models import Article, Paragraph, DifficultyLevel
-from ai_service import AIService
+from job_queue import enqueue_articles
+from retention import purge_expired_articles, start_audio_sweeper
 
 # China Standard Time
 CN_TZ = timezone(timedelta(hours=8))
 
-static_dir = os.getenv("STATIC_DIR", "static")
-if not os.path.isabs(static_dir):
-    static_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), static_dir)
-    
-AUDIO_DIR = os.path.join(static_dir, "audio")
-
 # Mapping from Shanbay 'grade_info' or 'sbay_level' to our DifficultyLevel
 GRADE_MAP = {
     "高考": DifficultyLevel.INITIAL,
@@ -86,117 +82,204 @@ def clean_xml_content(request_xml_text):
                 parseds.append({'type': 'text', 'content': para_text})
     return parseds
 
-def import_json_string(data):
-    if isinstance(data, str): return data
-    return json.dumps(data, ensure_ascii=False)
+LIST_URL = "https://apiv3.shanbay.com/news/retrieve/articles"
+DETAIL_URL = "https://apiv3.shanbay.com/news/articles/{article_id}"
+SOURCE_URL = "https://web.shanbay.com/reading/web-news/articles/{article_id}"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+MAX_LIST_PAGES = 5 # Safety - 3 days fit in 3-5 pages usually
 
-def retry_with_backoff(func, *args, max_retries=3, initial_delay=2, backoff_factor=2, **kwargs):
-    """
-    Executes a function with a retry mechanism and exponential backoff.
-    """
-    delay = initial_delay
-    for attempt in range(max_retries):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            if attempt == max_retries - 1:
-                logger.error(f"在 {max_retries} 次尝试后失败。最后一次错误: {e}")
-                raise e
-            logger.warning(f"第 {attempt + 1} 次尝试失败: {e}。将在 {delay} 秒后重试...")
-            time.sleep(delay)
-            delay *= backoff_factor
-            
-def process_article_eagerly(session: Session, article: Article):
-    logger.info(f"正在进行文章积极处理流程: {article.title}")
-    
-    article_audio_dir = os.path.join(AUDIO_DIR, str(article.id))
-    os.makedirs(article_audio_dir, exist_ok=True)
-    
-    paragraphs = session.exec(select(Paragraph).where(Paragraph.article_id == article.id).order_by(Paragraph.order_index)).all()
-    
-    for p in paragraphs:
-        if not p.content.strip(): continue
+# Async discovery fetches the details of one list page concurrently.
+# Politeness: at most CRAWLER_CONCURRENCY requests in flight, each slot pausing CRAWLER_REQUEST_INTERVAL after its request.
+CRAWLER_ASYNC_DISCOVERY = os.getenv("CRAWLER_ASYNC_DISCOVERY", "true").lower() == "true"
+CRAWLER_CONCURRENCY = int(os.getenv("CRAWLER_CONCURRENCY", "3"))
+CRAWLER_REQUEST_INTERVAL = float(os.getenv("CRAWLER_REQUEST_INTERVAL", "0.5"))
 
-        # 1. Translation
-        if not p.translation:
+def _page_reaches_cutoff(articles_data, cutoff_date) -> bool:
+    for item in articles_data:
+        item_date_str = item.get('date')
+        if item_date_str:
             try:
-                trans_res = retry_with_backoff(AIService.translate_paragraph, p.content)
-                p.translation = import_json_string(trans_res)
-                session.add(p)
-                session.commit()
-                logger.debug(f"  - 段落 {p.id} 翻译完成")
-            except Exception as e:
-                logger.error(f"段落 {p.id} 翻译失败: {e}")
-            time.sleep(0.5)
+                item_date = datetime.strptime(item_date_str, "%Y-%m-%d").date()
+                if item_date < cutoff_date:
+                    logger.info(f"页面包含早于 {cutoff_date} 的文章。停止爬取。")
+                    return True
+            except: pass
+    return False
 
-        # 2. Syntax
-        if not p.syntax:
-            try:
-                syntax_res = retry_with_backoff(AIService.analyze_syntax, p.content)
-                p.syntax = import_json_string(syntax_res)
-                session.add(p)
-                session.commit()
-                logger.debug(f"  - 段落 {p.id} 句法分析完成")
-            except Exception as e:
-                logger.error(f"段落 {p.id} 句法分析失败: {e}")
-            time.sleep(0.5)
+def _existing_article_ids(session: Session, article_ids) -> set:
+    """Resolves which Shanbay ids of a list page are already stored, with a single IN query."""
+    ids = {str(aid): aid for aid in article_ids if aid}
+    if not ids:
+        return set()
+    rows = session.exec(select(Article.external_id).where(Article.external_id.in_(list(ids)))).all()
+    return {ids[external_id] for external_id in rows}
 
-        # 3. Audio
-        # Naming convention: static/audio/{article_id}/{article_id}_{order_index}.mp3
-        filename = f"{article.id}_{p.order_index}.mp3"
-        p_audio_path = os.path.join(article_audio_dir, filename)
-        rel_path = f"static/audio/{article.id}/{filename}"
-        
-        if not p.audio_path or not os.path.exists(p_audio_path):
-             try:
-                 audio_bytes = retry_with_backoff(AIService.generate_tts, p.content)
-                 if audio_bytes:
-                     with open(p_audio_path, "wb") as f:
-                         f.write(audio_bytes)
-                     p.audio_path = rel_path
-                     session.add(p)
-                     session.commit()
-                 else:
-                     logger.error(f"段落 {p.id} 生成 TTS 失败")
-             except Exception as e:
-                 logger.error(f"段落 {p.id} TTS 失败: {e}")
-             time.sleep(0.5)
+def _save_article(session: Session, article_id, detail: dict, cutoff_date) -> bool:
+    """Stores one article with its paragraphs. Returns False if the article is older than the cutoff."""
+    title_en = detail.get('title_en', 'No Title')
+    published_at_str = detail.get('published_at')
+    published_at = datetime.now(CN_TZ)
+    if published_at_str:
+        try:
+            dt_naive = datetime.strptime(published_at_str, "%Y-%m-%d %H:%M:%S")
+            published_at = dt_naive.replace(tzinfo=CN_TZ)
+        except: pass
+    
+    if published_at.date() < cutoff_date:
+        logger.info("文章太旧。停止。")
+        return False
 
-    # 4. Vocabulary (Batched by 20 to match pagination)
-    all_paras = session.exec(select(Paragraph).where(Paragraph.article_id == article.id).order_by(Paragraph.order_index)).all()
+    # Difficulty
+    grade_info = detail.get('grade_info')
+    sbay_level_name = detail.get('sbay_level', {}).get('name')
+    difficulty = DifficultyLevel.UNKNOWN
+    if grade_info and grade_info in GRADE_MAP: difficulty = GRADE_MAP[grade_info]
+    elif sbay_level_name and sbay_level_name in GRADE_MAP: difficulty = GRADE_MAP[sbay_level_name]
+
+    # Parse content
+    para_items = clean_xml_content(detail.get('content', ''))
+    word_count = sum(len(p['content'].split()) for p in para_items if p['type'] == 'text')
     
-    batch_size = 20
-    for i in range(0, len(all_paras), batch_size):
-        batch = all_paras[i:i+batch_size]
-        
-        # Check if already has analysis
-        if all(p.analysis for p in batch):
+    # Save Article
+    article = Article(
+        title=title_en,
+        source_url=SOURCE_URL.format(article_id=article_id),
+        external_id=str(article_id),
+        cover_image=detail.get('thumbnail_urls', [None])[0],
+        difficulty=difficulty,
+        word_count=word_count,
+        published_at=published_at,
+        created_at=datetime.now(CN_TZ)
+    )
+    session.add(article)
+    session.commit()
+    session.refresh(article)
+    
+    # Save Paragraphs
+    for idx, p_item in enumerate(para_items):
+        p = Paragraph(
+            article_id=article.id,
+            order_index=idx + 1,
+            content=p_item['content'] if p_item['type'] == 'text' else "",
+            image_url=p_item['content'] if p_item['type'] == 'image' else None
+        )
+        session.add(p)
+    session.commit()
+    
+    # Skip Eager Process here to avoid blocking discovery.
+    # Processing will be handled in the second pass.
+    return True
+
+def _new_items(session: Session, articles_data) -> list:
+    existing_ids = _existing_article_ids(session, [item.get('id') for item in articles_data])
+    new_items = []
+    for item in articles_data:
+        if item.get('id') in existing_ids:
+            logger.info(f"文章已存在，跳过抓取: {item.get('title') or item.get('id')}")
+            # Skip discovery as it's already in DB. 
+            # Processing will be handled in the second pass.
             continue
+        new_items.append(item)
+    return new_items
 
-        logger.info(f"  - 正在分析第 {i//batch_size + 1} 批词汇")
+def discover_articles(session: Session, cutoff_date):
+    """Sequential discovery: list pages and article details are fetched one after another."""
+    http = get_http_session()
+    page = 1
+    
+    while page <= MAX_LIST_PAGES:
+        logger.info(f"正在抓取第 {page} 页...")
+        try:
+            resp = http.get(LIST_URL, params={"ipp": 10, "page": page}, headers=HEADERS)
+            if resp.status_code != 200: break
+            articles_data = resp.json().get('objects', [])
+            if not articles_data: 
+                logger.info("未发现更多文章。")
+                break
+        except Exception as e:
+            logger.error(f"网络错误: {e}")
+            break
         
-        for p in batch:
-            if not p.analysis and p.content.strip():
-                try:
-                    analysis_json = retry_with_backoff(AIService.analyze_vocabulary, p.content, article.difficulty.value)
-                    if isinstance(analysis_json, list):
-                        p.analysis = import_json_string(analysis_json)
-                        session.add(p)
-                except Exception as e:
-                    logger.error(f"段落 {p.id} 词汇分析失败: {e}")
-                time.sleep(0.5)
+        if _page_reaches_cutoff(articles_data, cutoff_date):
+            break
         
-        session.commit()
-        logger.info(f"  - 第 {i//batch_size + 1} 批词汇分析完成")
+        for item in _new_items(session, articles_data):
+            article_id = item.get('id')
+            # Fetch details
+            try:
+                detail_resp = http.get(DETAIL_URL.format(article_id=article_id), headers=HEADERS)
+                if detail_resp.status_code != 200: continue
+                detail = detail_resp.json()
+            except: continue
+            
+            if not _save_article(session, article_id, detail, cutoff_date):
+                return
+            
+            time.sleep(1) # Rate limit
+
+        page += 1
         time.sleep(1)
 
+async def _fetch_json(client: aiohttp.ClientSession, url: str, slots: asyncio.Semaphore, params=None, retries: int = 3):
+    """GET with a politeness slot and retry/backoff on network errors, 429 and 5xx. Returns None on failure."""
+    delay = 1
+    for attempt in range(retries):
+        async with slots:
+            try:
+                async with client.get(url, params=params) as resp:
+                    if resp.status == 200:
+                        return await resp.json(content_type=None)
+                    if resp.status != 429 and resp.status < 500:
+                        return None
+                    logger.warning(f"请求 {url} 返回 {resp.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"请求 {url} 失败: {e}")
+            finally:
+                await asyncio.sleep(CRAWLER_REQUEST_INTERVAL)
+        if attempt < retries - 1:
+            await asyncio.sleep(delay)
+            delay *= 2
+    return None
+
+async def discover_articles_async(cutoff_date):
+    """
+    Async discovery: the details of each list page are fetched concurrently under a
+    politeness limit, then stored in list order so the cutoff still stops the crawl.
+    """
+    slots = asyncio.Semaphore(CRAWLER_CONCURRENCY)
+    timeout = aiohttp.ClientTimeout(connect=HTTP_TIMEOUT[0], sock_read=HTTP_TIMEOUT[1])
+    connector = aiohttp.TCPConnector(limit_per_host=CRAWLER_CONCURRENCY)
+
+    async with aiohttp.ClientSession(headers=HEADERS, timeout=timeout, connector=connector) as client:
+        with Session(engine) as session:
+            for page in range(1, MAX_LIST_PAGES + 1):
+                logger.info(f"正在抓取第 {page} 页...")
+                data = await _fetch_json(client, LIST_URL, slots, params={"ipp": 10, "page": page})
+                articles_data = (data or {}).get('objects', [])
+                if not articles_data:
+                    logger.info("未发现更多文章。")
+                    return
+
+                if _page_reaches_cutoff(articles_data, cutoff_date):
+                    return
+
+                new_items = _new_items(session, articles_data)
+                details = await asyncio.gather(*[
+                    _fetch_json(client, DETAIL_URL.format(article_id=item.get('id')), slots)
+                    for item in new_items
+                ])
+
+                for item, detail in zip(new_items, details):
+                    if detail is None:
+                        continue
+                    if not _save_article(session, item.get('id'), detail, cutoff_date):
+                        return
+
 def fetch_shanbay_articles():
     now_cn = datetime.now(CN_TZ)
     print(f"[{now_cn}] Starting Shanbay crawl...")
-    list_url = "https://apiv3.shanbay.com/news/retrieve/articles"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
     
     # Retention Policy: Last 3 days ONLY (Today, Yesterday, Day Before)
     today_cn = now_cn.date()
@@ -206,164 +289,45 @@ def fetch_shanbay_articles():
     # 1. Cleanup Old Data First (Delete anything older than cutoff)
     logger.info("Phase 1: 开始清理旧文章")
     try:
-        with Session(engine) as session:
-            # Cutoff datetime at start of day
-            cutoff_dt = datetime.combine(cutoff_date, datetime.min.time()).replace(tzinfo=CN_TZ)
-            print(f"Cleaning up articles older than {cutoff_dt}")
-            
-            statement = select(Article).where((Article.published_at < cutoff_dt) | (Article.published_at == None))
-            articles_to_delete = session.exec(statement).all()
-            
-            if articles_to_delete:
-                logger.info(f"正在清理 {len(articles_to_delete)} 篇旧文章...")
-                for art in articles_to_delete:
-                    # Cleanup audio directory
-                    try:
-                        audio_path = os.path.join(AUDIO_DIR, str(art.id))
-                        if os.path.exists(audio_path):
-                            shutil.rmtree(audio_path)
-                    except Exception as e:
-                        logger.error(f"删除文章 {art.id} 的音视频目录失败: {e}")
-
-                    session.delete(art)
-                
-                session.commit()
-                print(f"Cleanup: Deleted {len(articles_to_delete)} old articles.")
-            else:
-                print("Cleanup: No old articles found.")
+        # Cutoff datetime at start of day
+        cutoff_dt = datetime.combine(cutoff_date, datetime.min.time()).replace(tzinfo=CN_TZ)
+        print(f"Cleaning up articles older than {cutoff_dt}")
+        stats = purge_expired_articles(cutoff_dt)
+        print(f"Cleanup: Deleted {stats['articles']} old articles.")
     except Exception as e:
         print(f"Cleanup failed: {e}")
+    # Audio directories of deleted articles are removed in the background while the crawl runs
+    start_audio_sweeper()
 
 
     # 2. Fetch New Articles
     logger.info("Phase 2: 开始爬取新文章")
-    page = 1
-    stop_crawling = False
-    
-    with Session(engine) as session:
-        while not stop_crawling:
-            logger.info(f"正在抓取第 {page} 页...")
-            try:
-                resp = requests.get(list_url, params={"ipp": 10, "page": page}, headers=headers)
-                if resp.status_code != 200: break
-                articles_data = resp.json().get('objects', [])
-                if not articles_data: 
-                    logger.info("未发现更多文章。")
-                    break
-            except Exception as e:
-                logger.error(f"网络错误: {e}")
-                break
-            
-            # Check dates
-            for item in articles_data:
-                item_date_str = item.get('date')
-                if item_date_str:
-                    try:
-                        item_date = datetime.strptime(item_date_str, "%Y-%m-%d").date()
-                        if item_date < cutoff_date:
-                            logger.info(f"页面包含早于 {cutoff_date} 的文章。停止爬取。")
-                            stop_crawling = True
-                            break
-                    except: pass
-            
-            if stop_crawling:
-                break
-            
-            for item in articles_data:
-                article_id = item.get('id')
-                
-                existing = session.exec(select(Article).where(Article.source_url.contains(article_id))).first()
-                if existing:
-                    logger.info(f"文章已存在，跳过抓取: {item.get('title') or article_id}")
-                    # Skip discovery as it's already in DB. 
-                    # Processing will be handled in the second pass.
-                    continue
-                
-                # Fetch details
-                try:
-                    detail_resp = requests.get(f"https://apiv3.shanbay.com/news/articles/{article_id}", headers=headers)
-                    if detail_resp.status_code != 200: continue
-                    detail = detail_resp.json()
-                except: continue
-                
-                title_en = detail.get('title_en', 'No Title')
-                published_at_str = detail.get('published_at')
-                published_at = datetime.now(CN_TZ)
-                if published_at_str:
-                    try:
-                        dt_naive = datetime.strptime(published_at_str, "%Y-%m-%d %H:%M:%S")
-                        published_at = dt_naive.replace(tzinfo=CN_TZ)
-                    except: pass
-                
-                if published_at.date() < cutoff_date:
-                    logger.info("文章太旧。停止。")
-                    stop_crawling = True
-                    break
-
-                # Difficulty
-                grade_info = detail.get('grade_info')
-                sbay_level_name = detail.get('sbay_level', {}).get('name')
-                difficulty = DifficultyLevel.UNKNOWN
-                if grade_info and grade_info in GRADE_MAP: difficulty = GRADE_MAP[grade_info]
-                elif sbay_level_name and sbay_level_name in GRADE_MAP: difficulty = GRADE_MAP[sbay_level_name]
-
-                # Parse content
-                para_items = clean_xml_content(detail.get('content', ''))
-                word_count = sum(len(p['content'].split()) for p in para_items if p['type'] == 'text')
-                
-                # Save Article
-                article = Article(
-                    title=title_en,
-                    source_url=f"https://web.shanbay.com/reading/web-news/articles/{article_id}",
-                    cover_image=detail.get('thumbnail_urls', [None])[0],
-                    difficulty=difficulty,
-                    word_count=word_count,
-                    published_at=published_at,
-                    created_at=datetime.now(CN_TZ)
-                )
-                session.add(article)
-                session.commit()
-                session.refresh(article)
-                
-                # Save Paragraphs
-                for idx, p_item in enumerate(para_items):
-                    p = Paragraph(
-                        article_id=article.id,
-                        order_index=idx + 1,
-                        content=p_item['content'] if p_item['type'] == 'text' else "",
-                        image_url=p_item['content'] if p_item['type'] == 'image' else None
-                    )
-                    session.add(p)
-                session.commit()
-                session.refresh(article)
-                
-                # Skip Eager Process here to avoid blocking discovery.
-                # Processing will be handled in the second pass.
-                # process_article_eagerly(session, article)
-                
-                time.sleep(1) # Rate limit
-
-            page += 1
-            if page > 5: break # Safety - 3 days fit in 3-5 pages usually
-
-            time.sleep(1)
+    if CRAWLER_ASYNC_DISCOVERY:
+        try:
+            asyncio.run(discover_articles_async(cutoff_date))
+        except Exception as e:
+            logger.error(f"异步抓取失败: {e}")
+    else:
+        with Session(engine) as session:
+            discover_articles(session, cutoff_date)
 
-    # 3. Phase 2: Sequential Processing Pass
-    # After discovering all new articles, we iterate through recent articles to process them.
-    logger.info("Phase 3: 开始调用文章 AI 顺序处理每一篇文章")
+    # 3. Phase 3: Queue Processing Jobs
+    # Every missing AI task of recent articles becomes a durable job that worker.py processes
+    # (and resumes after a restart). Incomplete articles from earlier runs are re-queued as well.
+    logger.info("Phase 3: 开始为文章 AI 任务入队")
     with Session(engine) as session:
         # Re-calculate cutoff for identifying recent articles to process
         cutoff_dt = datetime.combine(cutoff_date, datetime.min.time()).replace(tzinfo=CN_TZ)
-        recent_articles = session.exec(select(Article).where(Article.published_at >= cutoff_dt)).all()
-        
-        for art in recent_articles:
-            # Re-fetch or check paragraphs to ensure we have the latest state
-            # Using the user's original check mechanism as requested
-            if not art.paragraphs or not art.paragraphs[0].translation:
-                try:
-                    process_article_eagerly(session, art)
-                except Exception as e:
-                    logger.error(f"文章 {art.id} 顺序处理失败: {e}")
+        recent_articles = session.exec(
+            select(Article).where(Article.published_at >= cutoff_dt).order_by(Article.published_at.desc())
+        ).all()
+
+        try:
+            queued = enqueue_articles(session, recent_articles)
+            session.commit()
+            logger.info(f"已入队 {queued} 个处理任务")
+        except Exception as e:
+            logger.error(f"文章任务入队失败: {e}")
 
 
 if __name__ == "__main__":
@@ -371,5 +335,5 @@ if __name__ == "__main__":
     from log_conf import setup_logging
     setup_logging()
     
-    # Trigger full crawl and process
+    # Trigger full crawl; the queued AI jobs are processed by worker.py
     fetch_shanbay_articles()
@@ -1,12 +1,104 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./readally.db")
+# SQLAlchemy only accepts the postgresql:// scheme
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = "postgresql://" + DATABASE_URL[len("postgres://"):]
 
-engine = create_engine(DATABASE_URL, echo=False, connect_args={"check_same_thread": False})
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# Connection pool, per engine. Sized for the FastAPI threadpool (sync endpoints) plus crawler/worker/analysis threads.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle server-side connections before the server or a proxy drops them (Postgres only)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite tuning, applied to every new connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL: readers never block the writer and the writer never blocks readers
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # NORMAL is durable across application crashes in WAL mode and avoids an fsync per commit
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Wait for the write lock instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    # Negative cache_size is in KiB
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _async_url(url: str) -> str:
+    """Same database through an asyncio driver (aiosqlite / asyncpg) unless the URL already names one."""
+    scheme, rest = url.split("://", 1)
+    if "+" in scheme and scheme.split("+", 1)[1] in ("aiosqlite", "asyncpg", "psycopg", "psycopg_async"):
+        return url
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def _build_engine(url: str = DATABASE_URL, factory=create_engine):
+    if not IS_SQLITE:
+        return factory(
+            url,
+            echo=False,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+
+    pool_args = {}
+    if ":memory:" not in url and not url.rstrip("/").endswith(":"):
+        # File databases use a QueuePool; in-memory ones keep SQLAlchemy's single-connection pool
+        pool_args = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    sqlite_engine = factory(
+        url,
+        echo=False,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        **pool_args,
+    )
+    # Async engines fire pool events on their sync facade
+    event.listen(getattr(sqlite_engine, "sync_engine", sqlite_engine), "connect", _set_sqlite_pragmas)
+    return sqlite_engine
+
+
+# Sync engine: background threads (crawler, worker, analysis queue, AI cache) and endpoints that block on AI calls
+engine = _build_engine()
+# Async engine: request handlers that only talk to the database run on the event loop.
+# Built on first use, so processes that never serve requests (worker, crawler, migrations) do not need the async driver.
+_async_engine = None
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        url = _async_url(DATABASE_URL)
+        try:
+            _async_engine = _build_engine(url, create_async_engine)
+        except ModuleNotFoundError as e:
+            raise RuntimeError(
+                f"异步数据库驱动 {e.name} 未安装 ({url.split('://', 1)[0]})。"
+                f"PostgreSQL 请执行 `uv add asyncpg`，或在 DATABASE_URL 中指定已安装的异步驱动 (如 postgresql+psycopg://)"
+            ) from e
+    return _async_engine
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -14,3 +106,8 @@ def create_db_and_tables():
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    # expire_on_commit=False: attributes stay readable after commit without an implicit (sync) refresh
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,55 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeout in seconds applied to every request that does not pass its own
+HTTP_TIMEOUT = (
+    float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("HTTP_READ_TIMEOUT", "30")),
+)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+# Keep-alive connections kept per host
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that never lets a request wait without a timeout."""
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = HTTP_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=0.5,  # 0.5s, 1s, 2s ...
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(pool_connections=8, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    Shared requests.Session for all outbound HTTP in the backend (crawler, TTS downloads).
+    Connections are pooled per host and reused across threads.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # optional: `uv add brotli` enables Content-Encoding: br
+except ImportError:
+    brotli = None
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1000"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Streams must not be buffered, media is already compressed (and audio is served with Range support)
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "audio/", "image/", "video/")
+
+
+def _tag_etag(message: Message):
+    """Strong ETags identify one encoding of a representation: "abc" sent gzipped becomes "abc-gzip"."""
+    headers = MutableHeaders(raw=message["headers"])
+    etag = headers.get("etag")
+    encoding = headers.get("content-encoding")
+    if etag and etag.startswith('"') and encoding in ("gzip", "br"):
+        headers["etag"] = f'{etag[:-1]}-{encoding}"'
+
+
+class _Responder(IdentityResponder):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_tagged(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                _tag_etag(message)
+            await send(message)
+
+        await super().__call__(scope, receive, send_tagged)
+
+    async def send_with_compression(self, message: Message) -> None:
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            self.content_type_is_excluded = self.content_type_is_excluded or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+
+
+class _GZipResponder(_Responder, GZipResponder):
+    pass
+
+
+class _BrotliResponder(_Responder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses above COMPRESSION_MIN_SIZE with brotli (if installed and accepted) or gzip.
+    Responses that already carry a Content-Encoding (e.g. pre-compressed cached pages) are passed through.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and "br" in accept:
+            responder = _BrotliResponder(self.app, self.minimum_size)
+        elif "gzip" in accept:
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=GZIP_LEVEL)
+        else:
+            responder = _Responder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match matches etag (weak or strong) in any of its encodings."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    base = etag.removeprefix("W/").strip('"')
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if tag == base or tag in (f"{base}-gzip", f"{base}-br"):
+            return True
+    return False
+
+
+def dump_json(payload) -> bytes:
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag_json_response(request: Request, payload, cache_control: str = "no-cache") -> Response:
+    """JSON response with a strong ETag of its body; answers 304 when the client already has it."""
+    body = dump_json(payload)
+    etag = etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
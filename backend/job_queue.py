@@ -0,0 +1,240 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Collection, List, Optional
+
+from sqlalchemy import update, delete, func, or_, and_
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+from models import Article, Paragraph, ProcessingJob, JobStatus
+from processing import collect_work, TASK_TRANSLATION, TASK_SYNTAX, TASK_AUDIO
+
+logger = logging.getLogger(__name__)
+
+# A leased job is handed to another worker if its lease runs out (worker crashed or was killed)
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Retry delay after the n-th failed attempt: JOB_RETRY_DELAY * 2^(n-1) seconds
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", "30"))
+# Seconds before a finished (done/failed) job whose output is still missing may be queued again
+JOB_REQUEUE_COOLDOWN = int(os.getenv("JOB_REQUEUE_COOLDOWN", "3600"))
+
+# Job priorities, higher runs first
+PRIORITY_BACKGROUND = 0
+PRIORITY_FIRST_PAGE = 50  # first page of a newly crawled article
+PRIORITY_READER = 100     # page a reader has just opened
+
+# Paragraphs per reader page (see get_article_page)
+PAGE_SIZE = 20
+
+# Tasks a reader triggers on demand from an open page. Vocabulary is left out: the page request
+# itself (or the deferred analysis queue) produces it.
+READER_TASKS = (TASK_TRANSLATION, TASK_SYNTAX, TASK_AUDIO)
+
+
+def enqueue_paragraphs(session: Session, article: Article, paragraphs: List[Paragraph], priority: int = PRIORITY_BACKGROUND, tasks=None) -> int:
+    """
+    Creates a pending job for every task still missing on the given paragraphs of one article (optionally only tasks).
+    Pending jobs are raised to priority. Done/failed jobs whose output is still missing are queued again
+    once JOB_REQUEUE_COOLDOWN has passed since they finished; their attempts are kept, so a job that keeps
+    failing gets one more try per cool-down instead of a full retry cycle on every page view.
+    Returns the number of jobs created or changed. The caller commits.
+    """
+    items = [item for item in collect_work(article, paragraphs) if tasks is None or item.task in tasks]
+    if not items:
+        return 0
+
+    existing = {
+        (job.paragraph_id, job.task): job
+        for job in session.exec(select(ProcessingJob).where(ProcessingJob.paragraph_id.in_([item.paragraph_id for item in items]))).all()
+    }
+    now = datetime.utcnow()
+    requeue_before = now - timedelta(seconds=JOB_REQUEUE_COOLDOWN)
+    changed = 0
+    for item in items:
+        job = existing.get((item.paragraph_id, item.task))
+        if job is None:
+            session.add(ProcessingJob(paragraph_id=item.paragraph_id, article_id=article.id, task=item.task, priority=priority))
+            changed += 1
+        elif job.status == JobStatus.PENDING and job.priority < priority:
+            job.priority = priority
+            job.updated_at = now
+            session.add(job)
+            changed += 1
+        elif job.status in (JobStatus.DONE, JobStatus.FAILED) and job.updated_at < requeue_before:
+            job.status = JobStatus.PENDING
+            job.available_at = now
+            job.priority = max(job.priority, priority)
+            job.updated_at = now
+            session.add(job)
+            changed += 1
+    return changed
+
+
+def enqueue_articles(session: Session, articles: List[Article]) -> int:
+    """
+    Queues the missing tasks of whole articles: the first page of each article ahead of everything else
+    in the background, so every new article is readable first. Returns the number of jobs created or changed.
+    """
+    changed = 0
+    for article in articles:
+        paragraphs = session.exec(
+            select(Paragraph).where(Paragraph.article_id == article.id).order_by(Paragraph.order_index)
+            # collect_work checks which outputs exist: load all payloads in one query instead of one per paragraph
+            .options(selectinload(Paragraph.payload))
+        ).all()
+        article_changed = (
+            enqueue_paragraphs(session, article, paragraphs[:PAGE_SIZE], PRIORITY_FIRST_PAGE)
+            + enqueue_paragraphs(session, article, paragraphs[PAGE_SIZE:], PRIORITY_BACKGROUND)
+        )
+        if article_changed:
+            logger.info(f"文章 {article.title} 已入队任务: {article_changed}")
+        changed += article_changed
+    return changed
+
+
+def delete_article_jobs(session: Session, article_ids: List[int]):
+    """Drops the jobs of deleted articles. The caller commits."""
+    if article_ids:
+        session.execute(delete(ProcessingJob).where(ProcessingJob.article_id.in_(article_ids)))
+
+
+def lease_jobs(
+    session: Session,
+    worker_id: str,
+    limit: int,
+    lease_seconds: int = JOB_LEASE_SECONDS,
+    min_priority: Optional[int] = None,
+    max_priority: Optional[int] = None,
+    exclude_ids: Collection[int] = (),
+) -> List[ProcessingJob]:
+    """
+    Claims up to limit runnable jobs for worker_id, highest priority first, then in paragraph order.
+    min_priority/max_priority restrict the claim to a priority range; exclude_ids are never claimed
+    (the jobs the worker is still running).
+    The claim is a conditional UPDATE, so concurrent workers (threads, processes or hosts) never get the same job.
+    """
+    if limit <= 0:
+        return []
+
+    now = datetime.utcnow()
+    runnable = or_(
+        and_(ProcessingJob.status == JobStatus.PENDING, ProcessingJob.available_at <= now),
+        and_(ProcessingJob.status == JobStatus.RUNNING, ProcessingJob.lease_expires_at < now),
+    )
+    if min_priority is not None:
+        runnable = and_(runnable, ProcessingJob.priority >= min_priority)
+    if max_priority is not None:
+        runnable = and_(runnable, ProcessingJob.priority <= max_priority)
+    if exclude_ids:
+        runnable = and_(runnable, ProcessingJob.id.not_in(list(exclude_ids)))
+    candidate_ids = session.exec(
+        select(ProcessingJob.id)
+        .where(runnable)
+        .order_by(ProcessingJob.priority.desc(), ProcessingJob.paragraph_id, ProcessingJob.id)
+        .limit(limit)
+    ).all()
+    if not candidate_ids:
+        return []
+
+    lease_expires_at = now + timedelta(seconds=lease_seconds)
+    session.execute(
+        update(ProcessingJob)
+        .where(ProcessingJob.id.in_(candidate_ids), runnable)
+        .values(
+            status=JobStatus.RUNNING,
+            lease_owner=worker_id,
+            lease_expires_at=lease_expires_at,
+            attempts=ProcessingJob.attempts + 1,
+            updated_at=now,
+        )
+    )
+    session.commit()
+
+    # Only the rows this UPDATE won carry our owner and expiry
+    return session.exec(
+        select(ProcessingJob).where(
+            ProcessingJob.id.in_(candidate_ids),
+            ProcessingJob.lease_owner == worker_id,
+            ProcessingJob.lease_expires_at == lease_expires_at,
+        ).order_by(ProcessingJob.priority.desc(), ProcessingJob.paragraph_id, ProcessingJob.id)
+    ).all()
+
+
+def extend_leases(session: Session, worker_id: str, job_ids: Collection[int], lease_seconds: int = JOB_LEASE_SECONDS) -> int:
+    """
+    Renews worker_id's leases on jobs it is still running, so long groups are not handed to another worker.
+    Returns the number of leases renewed and commits.
+    """
+    if not job_ids:
+        return 0
+    now = datetime.utcnow()
+    renewed = session.execute(
+        update(ProcessingJob)
+        .where(
+            ProcessingJob.id.in_(list(job_ids)),
+            ProcessingJob.status == JobStatus.RUNNING,
+            ProcessingJob.lease_owner == worker_id,
+        )
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+    ).rowcount
+    session.commit()
+    return renewed
+
+
+def complete_job(session: Session, job: ProcessingJob):
+    """Marks a leased job done. The caller commits (together with the job's result)."""
+    job.status = JobStatus.DONE
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.last_error = None
+    job.updated_at = datetime.utcnow()
+    session.add(job)
+
+
+def fail_job(session: Session, job: ProcessingJob, error: str, max_attempts: int = JOB_MAX_ATTEMPTS):
+    """Schedules a retry with exponential backoff, or gives up after max_attempts. The caller commits."""
+    now = datetime.utcnow()
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.last_error = (error or "")[:1000]
+    job.updated_at = now
+    if job.attempts >= max_attempts:
+        job.status = JobStatus.FAILED
+        logger.error(f"任务 {job.id} (段落 {job.paragraph_id} {job.task}) 已失败 {job.attempts} 次，放弃")
+    else:
+        job.status = JobStatus.PENDING
+        job.available_at = now + timedelta(seconds=JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+    session.add(job)
+
+
+def work_items_for(session: Session, jobs: List[ProcessingJob]):
+    """
+    Builds the WorkItems for leased jobs. Jobs whose paragraph is gone or whose output already exists
+    are completed right away. Returns (items, {(paragraph_id, task): job}).
+    """
+    items = []
+    job_by_item = {}
+    articles = {}
+    for job in jobs:
+        p = session.get(Paragraph, job.paragraph_id)
+        article = p and (articles.get(p.article_id) or session.get(Article, p.article_id))
+        if not p or not article:
+            complete_job(session, job)
+            continue
+        articles[article.id] = article
+
+        item = next((i for i in collect_work(article, [p]) if i.task == job.task), None)
+        if item is None:
+            complete_job(session, job)
+            continue
+        items.append(item)
+        job_by_item[(item.paragraph_id, item.task)] = job
+    session.commit()
+    return items, job_by_item
+
+
+def queue_stats(session: Session) -> dict:
+    """Job counts per status, for logging."""
+    rows = session.exec(select(ProcessingJob.status, func.count()).group_by(ProcessingJob.status)).all()
+    return {JobStatus(status).value: count for status, count in rows}
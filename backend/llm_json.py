@@ -0,0 +1,147 @@
+import json
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for a top-level JSON array that arrives in chunks (e.g. a streamed LLM answer).
+    feed() returns the elements completed by the new text, so callers can use them before the array is closed.
+    Anything before the opening "[" (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0          # next character of _buf to scan
+        self._start = None     # start of the element being read, None between elements
+        self._depth = 0        # container nesting inside the array, 0 = element level
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> list:
+        items = []
+        if self.complete or not chunk:
+            return items
+
+        buf = self._buf + chunk
+        i = self._pos
+        while i < len(buf) and not self.complete:
+            c = buf[i]
+            if not self.started:
+                self.started = c == "["
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+                if self._start is None:
+                    self._start = i
+            elif c in "[{":
+                if self._start is None:
+                    self._start = i
+                self._depth += 1
+            elif c in "]}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    # Container element closed: emit right away instead of waiting for the comma
+                    items.append(json.loads(buf[self._start:i + 1]))
+                    self._start = None
+            elif self._depth == 0 and c in ",]":
+                if self._start is not None:
+                    # Scalar element (string, number, literal)
+                    items.append(json.loads(buf[self._start:i].strip()))
+                    self._start = None
+                self.complete = c == "]"
+            elif self._start is None and not c.isspace():
+                self._start = i
+            i += 1
+
+        # Keep only the unfinished element in the buffer
+        keep_from = i if self._start is None else self._start
+        self._buf = buf[keep_from:]
+        self._pos = i - keep_from
+        if self._start is not None:
+            self._start = 0
+        return items
+
+
+def _scan(text: str, start: int):
+    """
+    Scans the JSON value starting at text[start].
+    Returns (end, None) if the value is closed at text[end - 1], otherwise (cut, stack): the last position where
+    the text could be cut and still be made valid by closing the containers left open in stack.
+    """
+    stack = []
+    in_string = escape = False
+    string_is_key = False
+    prev = ""  # last significant character outside strings
+    cut = start
+    cut_stack = []
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                prev = '"'
+                if not string_is_key:
+                    cut, cut_stack = i + 1, list(stack)
+            continue
+
+        if c == '"':
+            in_string = True
+            string_is_key = bool(stack) and stack[-1] == "{" and prev in "{,"
+        elif c in "[{":
+            stack.append(c)
+            cut, cut_stack = i + 1, list(stack)
+        elif c in "]}":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                return i + 1, None
+            cut, cut_stack = i + 1, list(stack)
+        elif c == ",":
+            cut, cut_stack = i, list(stack)
+        if not c.isspace():
+            prev = c
+    return cut, cut_stack
+
+
+def parse_llm_json(text: str, expected: type = list):
+    """
+    Tolerant parser for LLM answers that should contain one JSON array or object.
+    Skips markdown fences and surrounding prose, and repairs a truncated answer by cutting it after the
+    last complete value and closing the open arrays/objects. The element (or object member) that was cut off
+    is dropped, so a repaired value only holds elements that were complete in the answer.
+    Returns (value, complete); complete is False when the value was repaired. Raises ValueError if nothing usable was found.
+    """
+    opener = "[" if expected is list else "{"
+    start = text.find(opener)
+    attempts = 0
+    while start != -1 and attempts < 5:
+        attempts += 1
+        end, open_stack = _scan(text, start)
+        try:
+            if open_stack is None:
+                return json.loads(text[start:end]), True
+            closers = "".join("]" if c == "[" else "}" for c in reversed(open_stack))
+            value = json.loads(text[start:end].rstrip().rstrip(",") + closers)
+            if len(open_stack) > 1 and value:
+                # The last top-level element was still open when the answer ended
+                if isinstance(value, list):
+                    value.pop()
+                else:
+                    value.pop(next(reversed(value)))
+            return value, False
+        except json.JSONDecodeError:
+            # Not JSON after all (e.g. "[1]" in prose), try the next candidate
+            start = text.find(opener, start + 1)
+    raise ValueError("No JSON value found in model output")
@@ -1,22 +1,27 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select
-from typing import List, Optional
+from http_encoding import CompressionMiddleware
+from sqlmodel import select
+from sqlalchemy import update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
 from datetime import datetime, timedelta, timezone
-from database import create_db_and_tables, get_session
-from models import User, Article, Paragraph, ReadingRecord
-from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from database import get_async_session, get_async_engine
+from migrate import run_migrations
+from models import User
+from auth import get_password_hash, verify_password, create_access_token, get_current_user, invalidate_cached_user
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 
 import reading_service
+import reading_stats
 import uvicorn
 import os
 import random
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from crawler.shanbay import fetch_shanbay_articles
-import asyncio
+import threading
+from worker import start_worker_thread, start_crawl_scheduler
 from log_conf import setup_logging
 import logging
 
@@ -29,7 +34,10 @@ CN_TZ = timezone(timedelta(hours=8))
 
 app = FastAPI(title="ReadAlly.AI Backend")
 
-scheduler = BackgroundScheduler()
+# Run the daily crawl and a job worker inside the API process (single-process setups only: every
+# uvicorn/gunicorn worker process would start its own). By default processing runs in `python worker.py`.
+EMBEDDED_WORKER = os.getenv("EMBEDDED_WORKER", "false").lower() == "true"
+worker_stop = threading.Event()
 
 
 app.include_router(reading_service.router, prefix="/api", tags=["Reading"])
@@ -49,6 +57,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses (gzip, or brotli when installed); SSE and media are left alone
+app.add_middleware(CompressionMiddleware)
+
 class UserCreate(BaseModel):
     email: str
     password: str
@@ -60,21 +71,28 @@ class Token(BaseModel):
 
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
+    # Brings an existing database up to the current schema before anything reads it
+    run_migrations()
+    # Fails at startup (not on the first request) if the async driver for DATABASE_URL is missing
+    get_async_engine()
     
-    # Schedule Shanbay crawler at 10:00 AM daily
-    scheduler.add_job(fetch_shanbay_articles, 'cron', hour=10, minute=0, timezone=CN_TZ)
-    scheduler.start()
-    print("调度器已启动。扇贝爬虫设置为每日上午 10:00 运行。")
+    if EMBEDDED_WORKER:
+        start_crawl_scheduler()
+        start_worker_thread(worker_stop)
     logger.info("系统启动成功，正在监听请求...")
 
+@app.on_event("shutdown")
+def on_shutdown():
+    worker_stop.set()
+
 @app.post("/register", response_model=Token)
-def register(user_in: UserCreate, session: Session = Depends(get_session)):
-    existing_user = session.exec(select(User).where(User.email == user_in.email)).first()
+async def register(user_in: UserCreate, session: AsyncSession = Depends(get_async_session)):
+    existing_user = (await session.exec(select(User).where(User.email == user_in.email))).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_pw = get_password_hash(user_in.password)
+    # bcrypt is CPU-bound; keep it off the event loop
+    hashed_pw = await run_in_threadpool(get_password_hash, user_in.password)
     
     # 10 random seeds for new users
     avatar_seeds = ["Cookie", "Cinnamon", "Muffin", "Peanut", "Lulu", "Ginger", "Pepper", "Sugar", "Bear", "Zoe"]
@@ -87,26 +105,26 @@ def register(user_in: UserCreate, session: Session = Depends(get_session)):
         avatar_seed=random_seed
     )
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
 
-    access_token = create_access_token(data={"sub": new_user.email})
+    access_token = create_access_token(data={"sub": new_user.email, "uid": new_user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    user = session.exec(select(User).where(User.email == form_data.username)).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_async_session)):
+    user = (await session.exec(select(User).where(User.email == form_data.username))).first()
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data={"sub": user.email, "uid": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/users/me", response_model=User)
-def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
 
 class UserUpdate(BaseModel):
@@ -114,19 +132,20 @@ class UserUpdate(BaseModel):
     avatar_seed: Optional[str] = None
 
 @app.patch("/users/me", response_model=User)
-def update_user_me(user_update: UserUpdate, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def update_user_me(user_update: UserUpdate, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
     if user_update.nickname is not None:
         current_user.nickname = user_update.nickname
     if user_update.avatar_seed is not None:
         current_user.avatar_seed = user_update.avatar_seed
     
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    invalidate_cached_user(current_user.email)
     return current_user
 
 @app.get("/users/me/stats")
-def get_user_stats(current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def get_user_stats(current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
     now_cn = datetime.now(CN_TZ)
     today_cn = now_cn.date()
     
@@ -134,17 +153,22 @@ def get_user_stats(current_user: User = Depends(get_current_user), session: Sess
     # Actually, we should check if it's been more than a day since last_read_date for the streak,
     # but for "words read today", we just check if it's today.
     
-    words_today = current_user.words_read_today
     if current_user.last_read_date:
         # last_read_date is saved in UTC, convert to CN_TZ
         lrd_utc = current_user.last_read_date.replace(tzinfo=timezone.utc)
         last_date_cn = lrd_utc.astimezone(CN_TZ).date()
         if last_date_cn < today_cn:
-            words_today = 0
-            current_user.words_read_today = 0
-            session.add(current_user)
-            session.commit()
-            session.refresh(current_user)
+            # The cached user can be behind reading recorded by another process: reset the counter only
+            # if the stored row is still from an earlier day, then return the stored values
+            today_start_utc = datetime.combine(today_cn, datetime.min.time(), CN_TZ).astimezone(timezone.utc).replace(tzinfo=None)
+            await session.execute(
+                update(User)
+                .where(User.id == current_user.id, User.last_read_date < today_start_utc)
+                .values(words_read_today=0)
+            )
+            await session.commit()
+            await session.refresh(current_user)
+            invalidate_cached_user(current_user.email)
 
     return {
         "wordsRead": current_user.words_read_today,
@@ -152,10 +176,11 @@ def get_user_stats(current_user: User = Depends(get_current_user), session: Sess
     }
 
 @app.post("/users/me/record-reading")
-def record_reading(article_id: int, word_count: int, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
+async def record_reading(article_id: int, word_count: int, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
     now_cn = datetime.now(CN_TZ)
     today_cn = now_cn.date()
-    today_str = today_cn.strftime("%Y-%m-%d")
+    # Counters are incremented below: start from the stored row, not the cached user
+    await session.refresh(current_user)
     
     # Reset words if it's a new day
     if current_user.last_read_date:
@@ -184,42 +209,43 @@ def record_reading(article_id: int, word_count: int, current_user: User = Depend
     current_user.last_read_date = datetime.utcnow()
     session.add(current_user)
 
-    # Handle ReadingRecord
-    record = session.exec(select(ReadingRecord).where(
-        ReadingRecord.user_id == current_user.id,
-        ReadingRecord.date == today_str
-    )).first()
+    # Daily record and monthly rollup (upserts)
+    await reading_stats.add_reading(session, current_user.id, today_cn, word_count)
 
-    if record:
-        record.words_read += word_count
-    else:
-        record = ReadingRecord(user_id=current_user.id, date=today_str, words_read=word_count)
-    session.add(record)
-
-    session.commit()
+    await session.commit()
+    invalidate_cached_user(current_user.email)
     
     return {"message": "Reading recorded", "words_today": current_user.words_read_today, "streak": current_user.current_streak}
 
 @app.get("/users/me/reading-records")
-def get_reading_records(year: int, month: int, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    month_prefix = f"{year}-{month:02d}-"
-    records = session.exec(select(ReadingRecord).where(
-        ReadingRecord.user_id == current_user.id,
-        ReadingRecord.date.startswith(month_prefix)
-    )).all()
-    return records
+async def get_reading_records(year: int, month: int, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    if not reading_stats.MIN_YEAR <= year <= reading_stats.MAX_YEAR:
+        raise HTTPException(status_code=400, detail="Invalid year")
+    if not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="Invalid month")
+    return await reading_stats.month_records(session, current_user.id, year, month)
+
+@app.get("/users/me/reading-summary")
+async def get_reading_summary(year: int, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    """Days and words read in a year, with per-month rollups (for the streak calendar)."""
+    if not reading_stats.MIN_YEAR <= year <= reading_stats.MAX_YEAR:
+        raise HTTPException(status_code=400, detail="Invalid year")
+    return await reading_stats.year_summary(session, current_user.id, year)
 class PasswordChange(BaseModel):
     old_password: str
     new_password: str
 
 @app.post("/users/me/password")
-def change_password(password_data: PasswordChange, current_user: User = Depends(get_current_user), session: Session = Depends(get_session)):
-    if not verify_password(password_data.old_password, current_user.hashed_password):
+async def change_password(password_data: PasswordChange, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_async_session)):
+    # Check against the stored hash, never a cached one
+    await session.refresh(current_user)
+    if not await run_in_threadpool(verify_password, password_data.old_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect old password")
     
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    current_user.hashed_password = await run_in_threadpool(get_password_hash, password_data.new_password)
     session.add(current_user)
-    session.commit()
+    await session.commit()
+    invalidate_cached_user(current_user.email)
     return {"message": "Password updated successfully"}
 
 from fastapi.staticfiles import StaticFiles
@@ -0,0 +1,87 @@
+"""
+Schema migrations, applied in order at startup (main.py, worker.py) or by hand:
+
+    python migrate.py
+
+The applied version is kept in the schemaversion table. Databases created before that table
+are at version 2 (migrations/migrate_v2.py, a one-off manual script); new databases are created
+from the models at the latest version.
+"""
+import logging
+import importlib
+from contextlib import contextmanager
+
+from sqlalchemy import inspect
+from sqlmodel import SQLModel, text
+from database import engine, IS_SQLITE, DATABASE_URL
+import models  # noqa: F401  (registers all tables)
+
+logger = logging.getLogger(__name__)
+
+LEGACY_VERSION = 2
+# migrations/migrate_v{N}.py for N in (LEGACY_VERSION, LATEST_VERSION]
+LATEST_VERSION = 10
+
+
+@contextmanager
+def _migration_lock():
+    """Only one process migrates at a time (the API and the worker start side by side)."""
+    if not IS_SQLITE:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(726500)"))
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(726500)"))
+        return
+
+    db_path = DATABASE_URL.split("///", 1)[1] if "///" in DATABASE_URL else ""
+    try:
+        import fcntl
+    except ImportError:  # Windows: single-process development setups
+        fcntl = None
+    if fcntl is None or not db_path or db_path == ":memory:":
+        yield
+        return
+    with open(f"{db_path}.migrate.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _current_version() -> int:
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schemaversion (version INTEGER NOT NULL)"))
+        version = conn.execute(text("SELECT MAX(version) FROM schemaversion")).scalar()
+    if version is not None:
+        return version
+    # No version recorded yet: an empty database is built from the models, anything else predates the table
+    return LEGACY_VERSION if inspect(engine).has_table("article") else LATEST_VERSION
+
+
+def _set_version(version: int):
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM schemaversion"))
+        conn.execute(text("INSERT INTO schemaversion (version) VALUES (:v)"), {"v": version})
+
+
+def run_migrations():
+    """Applies the pending migrations, then creates any missing tables."""
+    with _migration_lock():
+        version = _current_version()
+        for target in range(version + 1, LATEST_VERSION + 1):
+            logger.info(f"正在执行数据库迁移 v{target}...")
+            importlib.import_module(f"migrations.migrate_v{target}").migrate()
+            _set_version(target)
+        SQLModel.metadata.create_all(engine)
+        _set_version(LATEST_VERSION)
+        if version < LATEST_VERSION:
+            logger.info(f"数据库已迁移到 v{LATEST_VERSION}")
+
+
+if __name__ == "__main__":
+    from log_conf import setup_logging
+    setup_logging()
+    run_migrations()
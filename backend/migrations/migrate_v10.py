@@ -0,0 +1,27 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlmodel import text
+from database import engine
+
+def add_column_if_not_exists(table_name, column_name, column_type):
+    columns = [c["name"] for c in inspect(engine).get_columns(table_name)]
+    if column_name not in columns:
+        print(f"Adding column {column_name} to {table_name}...")
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+    else:
+        print(f"Column {column_name} already exists in {table_name}.")
+
+def migrate():
+    print("Starting Migration V10...")
+    # Version of an article's page content, checked by the page cache
+    add_column_if_not_exists("article", "content_version", "INTEGER NOT NULL DEFAULT 0")
+    print("Migration V10 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
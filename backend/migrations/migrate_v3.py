@@ -0,0 +1,65 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlmodel import Session, select, text
+from database import engine
+from models import Paragraph, hash_content
+
+BATCH_SIZE = 500
+
+def add_column_if_not_exists(table_name, column_name, column_type):
+    columns = [c["name"] for c in inspect(engine).get_columns(table_name)]
+    if column_name not in columns:
+        print(f"Adding column {column_name} to {table_name}...")
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+    else:
+        print(f"Column {column_name} already exists in {table_name}.")
+
+def create_index_if_not_exists(index_name, table_name, column_name):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column_name})"))
+    print(f"Index {index_name} ready.")
+
+def migrate_schema():
+    print("--- Migrating Schema ---")
+    add_column_if_not_exists("paragraph", "content_hash", "VARCHAR")
+    create_index_if_not_exists("ix_paragraph_content_hash", "paragraph", "content_hash")
+    print("Schema migration complete.")
+
+def backfill_content_hash():
+    print("--- Backfilling Paragraph Content Hashes ---")
+    total = 0
+    with Session(engine) as session:
+        while True:
+            rows = session.exec(
+                select(Paragraph.id, Paragraph.content)
+                .where(Paragraph.content_hash == None)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+
+            # Bulk UPDATE by primary key, bypassing the ORM so the blob columns are never loaded
+            session.execute(
+                text("UPDATE paragraph SET content_hash = :h WHERE id = :id"),
+                [{"h": hash_content(content), "id": pid} for pid, content in rows]
+            )
+            session.commit()
+            total += len(rows)
+            print(f"  -> {total} paragraphs hashed")
+
+    print(f"Backfill complete. {total} paragraphs updated.")
+
+def migrate():
+    print("Starting Migration V3...")
+    migrate_schema()
+    backfill_content_hash()
+    print("Migration V3 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,59 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlmodel import Session, select, text
+from database import engine
+from models import Article
+
+def add_column_if_not_exists(table_name, column_name, column_type):
+    columns = [c["name"] for c in inspect(engine).get_columns(table_name)]
+    if column_name not in columns:
+        print(f"Adding column {column_name} to {table_name}...")
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+    else:
+        print(f"Column {column_name} already exists in {table_name}.")
+
+def create_index_if_not_exists(index_name, table_name, columns):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+    print(f"Index {index_name} ready.")
+
+def migrate_schema():
+    print("--- Migrating Schema ---")
+    add_column_if_not_exists("article", "external_id", "VARCHAR")
+    create_index_if_not_exists("ix_article_external_id", "article", "external_id")
+    create_index_if_not_exists("ix_paragraph_article_order", "paragraph", "article_id, order_index")
+    print("Schema migration complete.")
+
+def backfill_external_id():
+    print("--- Backfilling Article External IDs ---")
+    with Session(engine) as session:
+        rows = session.exec(
+            select(Article.id, Article.source_url)
+            .where(Article.external_id == None, Article.source_url != None)
+        ).all()
+        # The source id is the last path segment of the source URL
+        updates = [
+            {"eid": url.rstrip("/").rsplit("/", 1)[-1], "id": aid}
+            for aid, url in rows
+            if url.rstrip("/")
+        ]
+        if updates:
+            session.execute(text("UPDATE article SET external_id = :eid WHERE id = :id"), updates)
+            session.commit()
+
+    print(f"Backfill complete. {len(updates)} articles updated.")
+
+def migrate():
+    print("Starting Migration V4...")
+    migrate_schema()
+    backfill_external_id()
+    print("Migration V4 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
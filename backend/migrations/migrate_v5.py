@@ -0,0 +1,35 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import text
+from database import engine
+
+def create_index_if_not_exists(index_name, table_name, columns):
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
+    print(f"Index {index_name} ready.")
+
+def backfill_published_at():
+    print("--- Backfilling Article published_at ---")
+    # The article list is paginated on published_at, so it must never be NULL
+    with engine.begin() as conn:
+        result = conn.execute(text("UPDATE article SET published_at = created_at WHERE published_at IS NULL"))
+    print(f"Backfill complete. {result.rowcount} articles updated.")
+
+def migrate_schema():
+    print("--- Migrating Schema ---")
+    create_index_if_not_exists("ix_article_published_at", "article", "published_at")
+    create_index_if_not_exists("ix_article_difficulty_published", "article", "difficulty, published_at")
+    print("Schema migration complete.")
+
+def migrate():
+    print("Starting Migration V5...")
+    backfill_published_at()
+    migrate_schema()
+    print("Migration V5 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,57 @@
+import sys
+import os
+import json
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlmodel import Session, select, text
+from database import engine
+from analysis_codec import dumps_analysis
+
+BATCH_SIZE = 500
+
+def compact_analysis():
+    print("--- Rewriting Paragraph Analysis In Compact Form ---")
+    if "analysis" not in [c["name"] for c in inspect(engine).get_columns("paragraph")]:
+        # Already moved to paragraphpayload (migrate_v7), written through CompactAnalysis
+        print("Column paragraph.analysis no longer exists, nothing to rewrite.")
+        return
+    total = 0
+    last_id = 0
+    with Session(engine) as session:
+        while True:
+            # Raw column text: plain JSON token arrays start with "[", compact rows with "{"
+            rows = session.exec(
+                select(text("id"), text("analysis")).select_from(text("paragraph"))
+                .where(text("id > :last_id AND analysis LIKE '[%'"))
+                .order_by(text("id"))
+                .limit(BATCH_SIZE),
+                params={"last_id": last_id}
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updates = []
+            for pid, analysis in rows:
+                try:
+                    updates.append({"a": dumps_analysis(json.loads(analysis)), "id": pid})
+                except ValueError:
+                    print(f"  -> Skipping paragraph {pid}: analysis is not valid JSON")
+            if updates:
+                session.execute(text("UPDATE paragraph SET analysis = :a WHERE id = :id"), updates)
+                session.commit()
+            total += len(updates)
+            print(f"  -> {total} paragraphs rewritten")
+
+    print(f"Rewrite complete. {total} paragraphs updated.")
+
+def migrate():
+    print("Starting Migration V6...")
+    compact_analysis()
+    print("Migration V6 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
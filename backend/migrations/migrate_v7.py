@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlmodel import SQLModel, text
+from database import engine, IS_SQLITE
+import models  # noqa: F401  (registers the paragraphpayload table)
+
+PAYLOAD_COLUMNS = ("translation", "syntax", "analysis")
+
+def create_payload_table():
+    print("--- Creating paragraphpayload table ---")
+    SQLModel.metadata.create_all(engine)
+    print("Table paragraphpayload ready.")
+
+def move_payloads():
+    print("--- Moving AI outputs out of paragraph ---")
+    columns = [c["name"] for c in inspect(engine).get_columns("paragraph")]
+    if not all(column in columns for column in PAYLOAD_COLUMNS):
+        print("Columns already moved.")
+        return False
+
+    with engine.begin() as conn:
+        # Stored values are copied as-is (analysis keeps its compact or legacy JSON text)
+        result = conn.execute(text(
+            "INSERT INTO paragraphpayload (paragraph_id, translation, syntax, analysis) "
+            "SELECT id, translation, syntax, analysis FROM paragraph "
+            "WHERE (translation IS NOT NULL OR syntax IS NOT NULL OR analysis IS NOT NULL) "
+            "AND id NOT IN (SELECT paragraph_id FROM paragraphpayload)"
+        ))
+        print(f"  -> {result.rowcount} paragraphs copied")
+        for column in PAYLOAD_COLUMNS:
+            conn.execute(text(f"ALTER TABLE paragraph DROP COLUMN {column}"))
+            print(f"  -> Dropped paragraph.{column}")
+    return True
+
+def vacuum():
+    # Dropped columns only give their space back after a VACUUM
+    print("--- Vacuuming ---")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    print("Vacuum complete.")
+
+def migrate():
+    print("Starting Migration V7...")
+    create_payload_table()
+    if move_payloads() and IS_SQLITE:
+        vacuum()
+    print("Migration V7 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,72 @@
+import sys
+import os
+from collections import defaultdict
+from datetime import date
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlmodel import SQLModel, text
+from database import engine, IS_SQLITE
+import models  # noqa: F401  (registers the readingmonth table)
+
+def create_rollup_table():
+    print("--- Creating readingmonth table ---")
+    SQLModel.metadata.create_all(engine)
+    print("Table readingmonth ready.")
+
+def merge_duplicate_days():
+    # Read-then-insert could create several rows for one day; fold them into the oldest before adding the unique index
+    print("--- Merging duplicate reading records ---")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE readingrecord SET words_read = ("
+            "SELECT SUM(r.words_read) FROM readingrecord r "
+            "WHERE r.user_id = readingrecord.user_id AND r.date = readingrecord.date) "
+            "WHERE id IN (SELECT MIN(id) FROM readingrecord GROUP BY user_id, date HAVING COUNT(*) > 1)"
+        ))
+        result = conn.execute(text(
+            "DELETE FROM readingrecord WHERE id NOT IN (SELECT MIN(id) FROM readingrecord GROUP BY user_id, date)"
+        ))
+    print(f"  -> {result.rowcount} duplicate rows removed")
+
+def migrate_schema():
+    print("--- Migrating Schema ---")
+    with engine.begin() as conn:
+        if not IS_SQLITE:
+            # SQLite keeps the 'YYYY-MM-DD' text, which is already how it stores DATE values
+            conn.execute(text("ALTER TABLE readingrecord ALTER COLUMN date TYPE DATE USING date::date"))
+            print("  -> readingrecord.date is now DATE")
+        conn.execute(text("DROP INDEX IF EXISTS ix_readingrecord_user_id"))
+        conn.execute(text("DROP INDEX IF EXISTS ix_readingrecord_date"))
+        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_readingrecord_user_date ON readingrecord (user_id, date)"))
+    print("Index ux_readingrecord_user_date ready.")
+
+def rebuild_rollups():
+    print("--- Rebuilding monthly rollups ---")
+    months = defaultdict(lambda: [0, 0])
+    with engine.begin() as conn:
+        for user_id, day, words in conn.execute(text("SELECT user_id, date, words_read FROM readingrecord")):
+            day = day if isinstance(day, date) else date.fromisoformat(str(day)[:10])
+            rollup = months[(user_id, day.replace(day=1))]
+            rollup[0] += 1
+            rollup[1] += words or 0
+
+        conn.execute(text("DELETE FROM readingmonth"))
+        if months:
+            conn.execute(
+                text("INSERT INTO readingmonth (user_id, month, days_read, words_read) VALUES (:u, :m, :d, :w)"),
+                [{"u": u, "m": m.isoformat() if IS_SQLITE else m, "d": d, "w": w} for (u, m), (d, w) in months.items()],
+            )
+    print(f"Rollups complete. {len(months)} user-months written.")
+
+def migrate():
+    print("Starting Migration V8...")
+    create_rollup_table()
+    merge_duplicate_days()
+    migrate_schema()
+    rebuild_rollups()
+    print("Migration V8 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,34 @@
+import sys
+import os
+import shutil
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_cache import BLOB_DIR, static_dir
+
+# Cached TTS files used to live in STATIC_DIR/ai_cache, which the /static mount serves publicly
+OLD_BLOB_DIR = os.path.join(static_dir, "ai_cache")
+
+def move_blobs():
+    print(f"--- Moving cached TTS files to {BLOB_DIR} ---")
+    if not os.path.isdir(OLD_BLOB_DIR):
+        print("Nothing to move.")
+        return
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    moved = 0
+    for name in os.listdir(OLD_BLOB_DIR):
+        target = os.path.join(BLOB_DIR, name)
+        if not os.path.exists(target):
+            shutil.move(os.path.join(OLD_BLOB_DIR, name), target)
+            moved += 1
+    shutil.rmtree(OLD_BLOB_DIR)
+    print(f"  -> {moved} files moved, {OLD_BLOB_DIR} removed")
+
+def migrate():
+    print("Starting Migration V9...")
+    move_blobs()
+    print("Migration V9 Finished Successfully.")
+
+if __name__ == "__main__":
+    migrate()
@@ -1,7 +1,10 @@
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import event, select, update, UniqueConstraint, Index
 from enum import Enum
+import hashlib
+from analysis_codec import CompactAnalysis
 
 class DifficultyLevel(str, Enum):
     INITIAL = "Initial" # 初阶 (高考)
@@ -24,38 +27,174 @@ class User(SQLModel, table=True):
     avatar_seed: str = Field(default="Cookie")
 
 class ReadingRecord(SQLModel, table=True):
+    """Words read by a user on one day; written by an upsert on (user_id, date)."""
+    __table_args__ = (Index("ux_readingrecord_user_date", "user_id", "date", unique=True),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(foreign_key="user.id", index=True)
-    date: str = Field(index=True) # YYYY-MM-DD in China Standard Time
+    user_id: int = Field(foreign_key="user.id")
+    date: date # Day in China Standard Time
+    words_read: int = Field(default=0)
+
+class ReadingMonth(SQLModel, table=True):
+    """Monthly rollup of ReadingRecord, kept up to date by the same transaction (yearly totals sum 12 rows)."""
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    month: date = Field(primary_key=True) # First day of the month
+    days_read: int = Field(default=0)
     words_read: int = Field(default=0)
 
 class Article(SQLModel, table=True):
+    # Dashboard listing: newest first, optionally filtered by difficulty
+    __table_args__ = (Index("ix_article_difficulty_published", "difficulty", "published_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     source_url: Optional[str] = None
+    # Id of the article at its source (e.g. the Shanbay article id), used as the slug in reader URLs
+    external_id: Optional[str] = Field(default=None, index=True)
     cover_image: Optional[str] = None
     difficulty: DifficultyLevel = Field(default=DifficultyLevel.UNKNOWN)
     word_count: int = 0
-    published_at: Optional[datetime] = None
+    published_at: Optional[datetime] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Eager Processing Fields
     full_audio_path: Optional[str] = None # Relative path to full audio
+    # Bumped on every ORM write to the article, its paragraphs or their payloads (from any process);
+    # the page cache serves a cached page only while this is unchanged
+    content_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     paragraphs: List["Paragraph"] = Relationship(back_populates="article", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
 
+class ArticleSummary(SQLModel):
+    """Article fields shown in the dashboard list."""
+    id: int
+    title: str
+    difficulty: DifficultyLevel
+    word_count: int
+    cover_image: Optional[str] = None
+    published_at: Optional[datetime] = None
+
+class ArticleList(SQLModel):
+    items: List[ArticleSummary]
+    next_cursor: Optional[str] = None  # pass as ?cursor= to get the next page, None on the last page
+
 class Paragraph(SQLModel, table=True):
+    # Pages are read as "paragraphs of an article in order"
+    __table_args__ = (Index("ix_paragraph_article_order", "article_id", "order_index"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     article_id: int = Field(foreign_key="article.id")
     order_index: int
     content: str
+    # sha256 of content, kept in sync on insert/update; lets text-based lookups use an index
+    content_hash: Optional[str] = Field(default=None, index=True)
     image_url: Optional[str] = None
 
     # Eager Processing Fields
-    translation: Optional[str] = Field(default=None)  # JSON string
-    syntax: Optional[str] = Field(default=None)       # JSON string
     audio_path: Optional[str] = None   # Relative path to static audio
-    analysis: Optional[str] = Field(default=None)     # JSON string for full text analysis
 
     article: Article = Relationship(back_populates="paragraphs")
+    # Heavy AI outputs live in their own table and are only loaded when accessed
+    payload: Optional["ParagraphPayload"] = Relationship(
+        back_populates="paragraph",
+        sa_relationship_kwargs={"uselist": False, "lazy": "select", "cascade": "all, delete-orphan"},
+    )
+
+    def _payload_property(name: str):
+        def get(self):
+            return getattr(self.payload, name) if self.payload is not None else None
+
+        def set(self, value):
+            if self.payload is None:
+                self.payload = ParagraphPayload()
+            setattr(self.payload, name, value)
+        return property(get, set)
+
+    # Read/write through to ParagraphPayload (not accepted as constructor arguments)
+    translation = _payload_property("translation")
+    syntax = _payload_property("syntax")
+    analysis = _payload_property("analysis")
+    del _payload_property
+
+class ParagraphPayload(SQLModel, table=True):
+    """AI outputs of one paragraph, kept out of the paragraph table so paragraph rows stay small."""
+    paragraph_id: Optional[int] = Field(default=None, primary_key=True, foreign_key="paragraph.id")
+    translation: Optional[str] = Field(default=None)  # JSON string
+    syntax: Optional[str] = Field(default=None)       # JSON string
+    # Vocabulary token list; stored in the compact form of analysis_codec
+    analysis: Optional[list] = Field(default=None, sa_type=CompactAnalysis)
 
+    paragraph: Optional[Paragraph] = Relationship(back_populates="payload")
+
+def hash_content(content: str) -> str:
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+@event.listens_for(Paragraph, "before_insert")
+@event.listens_for(Paragraph, "before_update")
+def _set_content_hash(mapper, connection, target):
+    target.content_hash = hash_content(target.content)
+
+
+@event.listens_for(Article, "before_update")
+def _bump_article_version(mapper, connection, target):
+    # SQL expression, so a bump made by a paragraph write in the same flush is not overwritten
+    target.content_version = Article.__table__.c.content_version + 1
+
+
+def _bump_version(connection, article_id):
+    connection.execute(
+        update(Article.__table__)
+        .where(Article.__table__.c.id == article_id)
+        .values(content_version=Article.__table__.c.content_version + 1)
+    )
+
+
+@event.listens_for(Paragraph, "after_insert")
+@event.listens_for(Paragraph, "after_update")
+@event.listens_for(Paragraph, "after_delete")
+def _paragraph_changed(mapper, connection, target):
+    _bump_version(connection, target.article_id)
+
+
+@event.listens_for(ParagraphPayload, "after_insert")
+@event.listens_for(ParagraphPayload, "after_update")
+@event.listens_for(ParagraphPayload, "after_delete")
+def _payload_changed(mapper, connection, target):
+    # Resolved on the flush's connection; loading target.paragraph here would re-enter the flush
+    _bump_version(connection, select(Paragraph.article_id).where(Paragraph.id == target.paragraph_id).scalar_subquery())
+
+
+class AIResultCache(SQLModel, table=True):
+    # sha256 of (task, model, prompt version, level, normalized text)
+    key: str = Field(primary_key=True)
+    task: str = Field(index=True)
+    payload: str  # JSON string, or the cache file name for binary results (TTS)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"  # gave up after max_attempts
+
+class ProcessingJob(SQLModel, table=True):
+    """One AI task (translation / syntax / audio / vocabulary) for one paragraph, processed by worker.py."""
+    __table_args__ = (UniqueConstraint("paragraph_id", "task"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    paragraph_id: int = Field(index=True)
+    article_id: int = Field(index=True)
+    task: str
+    status: JobStatus = Field(default=JobStatus.PENDING, index=True)
+    priority: int = Field(default=0, index=True)  # higher runs first
+    attempts: int = Field(default=0)
+    # Not before this time (retry backoff)
+    available_at: datetime = Field(default_factory=datetime.utcnow)
+    # Worker holding the job; an expired lease makes a running job available again
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,88 @@
+import os
+import gzip
+import time
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from fastapi import Request, Response
+from http_encoding import dump_json, etag_for, if_none_match
+
+# Serialized article pages kept in memory (per API process)
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "512"))
+# Seconds an unused page stays cached; freshness comes from Article.content_version, not from this TTL
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "600"))
+# Also keep a gzip copy and send it to clients that accept gzip
+PAGE_CACHE_GZIP = os.getenv("PAGE_CACHE_GZIP", "true").lower() == "true"
+
+
+class PageEntry(NamedTuple):
+    article_id: int
+    version: int  # Article.content_version the page was built from
+    expires_at: float
+    body: bytes
+    gzipped: Optional[bytes]
+    etag: str
+
+
+class PageCache:
+    """
+    LRU of finished article pages as ready-to-send JSON bytes, keyed by (article id or slug as requested, page).
+    Only pages whose paragraphs are fully processed are stored. Every ORM write to an article, paragraph or
+    payload bumps Article.content_version (see models.py), in this process or any other (worker, crawler), so
+    callers check the entry's version against the article row before serving it; deleted articles have no row.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, compress: bool):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.compress = compress
+        self._entries = OrderedDict()  # key -> PageEntry
+        self._lock = threading.Lock()
+
+    def lookup(self, key) -> Optional[PageEntry]:
+        """Returns the cached entry, or None. The caller validates entry.version before respond()."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def respond(self, entry: PageEntry, request: Request) -> Response:
+        return self._response(entry.body, entry.gzipped, entry.etag, request)
+
+    def put(self, key, article_id: int, version: int, payload: dict, request: Request, cache: bool = True) -> Response:
+        """Serializes payload once and returns the response; stores it if cache is set."""
+        body = dump_json(payload)
+        etag = etag_for(body)
+        gzipped = None
+        if cache and self.max_entries > 0:
+            gzipped = gzip.compress(body, compresslevel=6) if self.compress else None
+            with self._lock:
+                self._entries[key] = PageEntry(article_id, version, time.monotonic() + self.ttl, body, gzipped, etag)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return self._response(body, gzipped, etag, request)
+
+    def invalidate_article(self, article_id: int):
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry.article_id == article_id]:
+                del self._entries[key]
+
+    @staticmethod
+    def _response(body: bytes, gzipped, etag: str, request: Request) -> Response:
+        # Pages change while they are processed: clients revalidate every time and usually get a 304
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if if_none_match(request, etag):
+            return Response(status_code=304, headers=headers)
+        if gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            return Response(content=gzipped, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+page_cache = PageCache(PAGE_CACHE_MAX_ENTRIES, PAGE_CACHE_TTL, PAGE_CACHE_GZIP)
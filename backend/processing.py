@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlmodel import Session
+from models import Article, Paragraph
+from ai_service import AIService
+from audio_store import paragraph_audio_paths, ensure_paragraph_audio
+
+logger = logging.getLogger(__name__)
+
+# Base size of a worker's thread pool (see WORKER_MAX_IN_FLIGHT).
+# The real concurrency per model is bounded by MODEL_THROTTLES in ai_service.
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "12"))
+# Translation/syntax paragraphs of the same article sent in one LLM request (1 disables batching)
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "5"))
+# Upper bound on the paragraph text of one batched request, keeps prompts and answers short enough
+AI_BATCH_MAX_CHARS = int(os.getenv("AI_BATCH_MAX_CHARS", "4000"))
+
+TASK_TRANSLATION = "translation"
+TASK_SYNTAX = "syntax"
+TASK_AUDIO = "audio"
+TASK_VOCABULARY = "vocabulary"
+
+# Paragraph column each task writes to
+TASK_FIELDS = {
+    TASK_TRANSLATION: "translation",
+    TASK_SYNTAX: "syntax",
+    TASK_AUDIO: "audio_path",
+    TASK_VOCABULARY: "analysis",
+}
+
+
+def import_json_string(data):
+    if isinstance(data, str): return data
+    return json.dumps(data, ensure_ascii=False)
+
+
+def retry_with_backoff(func, *args, max_retries=3, initial_delay=2, backoff_factor=2, **kwargs):
+    """
+    Executes a function with a retry mechanism and exponential backoff.
+    """
+    delay = initial_delay
+    for attempt in range(max_retries):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries - 1:
+                logger.error(f"在 {max_retries} 次尝试后失败。最后一次错误: {e}")
+                raise e
+            logger.warning(f"第 {attempt + 1} 次尝试失败: {e}。将在 {delay} 秒后重试...")
+            time.sleep(delay)
+            delay *= backoff_factor
+
+
+@dataclass
+class WorkItem:
+    """One AI task for one paragraph. Carries plain values so workers never touch the Session."""
+    paragraph_id: int
+    article_id: int
+    order_index: int
+    content: str
+    level: str
+    task: str
+
+
+def collect_work(article: Article, paragraphs: List[Paragraph]) -> List[WorkItem]:
+    """Lists the tasks that are still missing for the given paragraphs of one article."""
+    level = article.difficulty.value
+    items = []
+    for p in paragraphs:
+        if not p.content.strip(): continue
+
+        def item(task):
+            return WorkItem(p.id, article.id, p.order_index, p.content, level, task)
+
+        if not p.translation:
+            items.append(item(TASK_TRANSLATION))
+        if not p.syntax:
+            items.append(item(TASK_SYNTAX))
+        abs_path, _ = paragraph_audio_paths(article.id, p.order_index)
+        if not p.audio_path or not os.path.exists(abs_path):
+            items.append(item(TASK_AUDIO))
+        if not p.analysis:
+            items.append(item(TASK_VOCABULARY))
+    return items
+
+
+# Placeholders AIService returns instead of raising (shown as-is by the on-demand endpoints)
+FAILED_TRANSLATIONS = ("Translation failed.", "Translation error.")
+
+
+def usable_result(task: str, result):
+    """The result if it can be stored on the paragraph; None for failure placeholders and empty output."""
+    if task == TASK_TRANSLATION:
+        if not isinstance(result, dict) or not result.get("translation") or result["translation"] in FAILED_TRANSLATIONS:
+            return None
+    elif task == TASK_SYNTAX:
+        if not isinstance(result, dict) or "error" in result:
+            return None
+    elif task == TASK_VOCABULARY:
+        if not isinstance(result, list) or not result:
+            return None
+    return result
+
+
+def run_task(item: WorkItem):
+    """
+    Runs a single AI task in a worker thread.
+    Returns the value to store on the paragraph, or None if the task produced nothing usable.
+    """
+    if item.task == TASK_TRANSLATION:
+        result = usable_result(item.task, retry_with_backoff(AIService.translate_paragraph, item.content))
+        return import_json_string(result) if result is not None else None
+
+    if item.task == TASK_SYNTAX:
+        result = usable_result(item.task, retry_with_backoff(AIService.analyze_syntax, item.content))
+        return import_json_string(result) if result is not None else None
+
+    if item.task == TASK_AUDIO:
+        # Shares the single-flight with on-demand /tts requests for the same paragraph
+        abs_path = ensure_paragraph_audio(
+            item.article_id, item.order_index, item.content,
+            generate=lambda text: retry_with_backoff(AIService.generate_tts, text)
+        )
+        if not abs_path:
+            return None
+        _, rel_path = paragraph_audio_paths(item.article_id, item.order_index)
+        return rel_path
+
+    if item.task == TASK_VOCABULARY:
+        return usable_result(item.task, retry_with_backoff(AIService.analyze_vocabulary, item.content, item.level))
+
+    raise ValueError(f"Unknown task: {item.task}")
+
+
+# Batched AIService method for each task that supports batching
+BATCH_FUNCTIONS = {
+    TASK_TRANSLATION: AIService.translate_paragraphs,
+    TASK_SYNTAX: AIService.analyze_syntax_batch,
+}
+
+
+def group_work(items: List[WorkItem], batch_size: int = AI_BATCH_SIZE, max_chars: int = AI_BATCH_MAX_CHARS) -> List[List[WorkItem]]:
+    """
+    Groups work items into units submitted to the pool.
+    Translation/syntax items of the same article are packed into batches of up to batch_size
+    paragraphs and max_chars characters; every other item is a unit on its own.
+    """
+    groups = []
+    open_batches = {}
+    for item in items:
+        if item.task not in BATCH_FUNCTIONS or batch_size <= 1:
+            groups.append([item])
+            continue
+
+        key = (item.article_id, item.task)
+        batch = open_batches.get(key)
+        if batch and (len(batch) >= batch_size or sum(len(i.content) for i in batch) + len(item.content) > max_chars):
+            batch = None
+        if batch is None:
+            batch = []
+            open_batches[key] = batch
+            groups.append(batch)
+        batch.append(item)
+    return groups
+
+
+def run_group(group: List[WorkItem]) -> list:
+    """Runs one unit from group_work. Returns one value (or None) per item, in order."""
+    if len(group) == 1:
+        return [run_task(group[0])]
+
+    task = group[0].task
+    results = [usable_result(task, r) for r in retry_with_backoff(BATCH_FUNCTIONS[task], [item.content for item in group])]
+    return [import_json_string(r) if r is not None else None for r in results]
+
+
+def apply_results(session: Session, group: List[WorkItem], values: Optional[list], error: Optional[str] = None, on_result=None):
+    """
+    Writes the results of one finished group to its paragraphs (on the Session's thread, without committing).
+    error is set when the whole group raised. Returns (succeeded, failed) counts.
+    """
+    succeeded = failed = 0
+    for n, item in enumerate(group):
+        value = values[n] if values is not None else None
+        if value is None:
+            logger.error(f"段落 {item.paragraph_id} {item.task} 失败: {error or '未返回有效结果'}")
+            if on_result:
+                on_result(item, error or "no usable result")
+            failed += 1
+            continue
+
+        p = session.get(Paragraph, item.paragraph_id)
+        if p:
+            setattr(p, TASK_FIELDS[item.task], value)
+            session.add(p)
+            succeeded += 1
+            logger.debug(f"  - 段落 {item.paragraph_id} {item.task} 完成")
+        # else: paragraph removed (e.g. retention cleanup) while the task was running
+        if on_result:
+            on_result(item, None)
+    return succeeded, failed
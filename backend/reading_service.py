@@ -1,128 +1,306 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlmodel import Session, select
+from sqlalchemy import func, or_, and_, type_coerce, Text
+from sqlalchemy.orm import selectinload
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
-from database import get_session
-from models import Article, Paragraph, DifficultyLevel
+from database import get_session, get_async_session, get_async_engine, engine
+from models import Article, ArticleList, ArticleSummary, Paragraph, ParagraphPayload, DifficultyLevel, hash_content
 from ai_service import AIService
+from analysis_queue import analysis_queue
+from page_cache import page_cache
+from analysis_codec import analysis_for_output, dumps_analysis
+from http_encoding import etag_json_response, if_none_match
+from processing import usable_result, TASK_TRANSLATION, TASK_SYNTAX, TASK_VOCABULARY
+from job_queue import enqueue_paragraphs, PAGE_SIZE, PRIORITY_READER, READER_TASKS
+from audio_store import paragraph_audio_paths, ensure_paragraph_audio
 from auth import get_current_user
+import base64
+import hashlib
 import logging
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/articles", response_model=List[Article])
-def get_articles(
+def _encode_cursor(published_at: datetime, article_id: int) -> str:
+    raw = json.dumps([published_at.isoformat(), article_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str):
+    try:
+        published_at, article_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(published_at), int(article_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/articles", response_model=ArticleList)
+async def get_articles(
+    request: Request,
+    response: Response,
     difficulty: Optional[DifficultyLevel] = None,
-    session: Session = Depends(get_session)
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_session)
 ):
-    query = select(Article)
+    """
+    Newest articles first, limit per page. Pass the returned next_cursor as ?cursor= for the next page.
+    Supports If-None-Match: the list only changes when articles are added or removed.
+    """
+    # Articles are only ever inserted (new ids) or deleted, so count + max id identifies the list's state
+    count, max_id = (await session.exec(select(func.count(Article.id), func.max(Article.id)))).one()
+    etag = 'W/"' + hashlib.md5(f"{count}:{max_id}:{difficulty}:{cursor}:{limit}".encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+    query = select(
+        Article.id, Article.title, Article.difficulty, Article.word_count, Article.cover_image, Article.published_at
+    )
     if difficulty:
         query = query.where(Article.difficulty == difficulty)
-    query = query.order_by(Article.published_at.desc())
-    return session.exec(query).all()
+    if cursor:
+        # Keyset pagination on (published_at, id), both descending
+        published_at, article_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Article.published_at < published_at,
+            and_(Article.published_at == published_at, Article.id < article_id),
+        ))
+    # Served by the (difficulty, published_at) / published_at indexes; published_at is always set
+    # (the crawler sets it, migrate_v5 backfills older rows)
+    query = query.order_by(Article.published_at.desc(), Article.id.desc()).limit(limit + 1)
+    rows = (await session.exec(query)).all()
+
+    next_cursor = _encode_cursor(rows[limit - 1].published_at, rows[limit - 1].id) if len(rows) > limit else None
+    return ArticleList(items=[ArticleSummary(**row._mapping) for row in rows[:limit]], next_cursor=next_cursor)
+
+def _boost_page_jobs(article_id: int, paragraph_ids: List[int], page_num: int):
+    # Runs after the response is sent, with its own session
+    with Session(engine) as session:
+        try:
+            article = session.get(Article, article_id)
+            paragraphs = session.exec(
+                select(Paragraph).where(Paragraph.id.in_(paragraph_ids)).options(selectinload(Paragraph.payload))
+            ).all()
+            if article and enqueue_paragraphs(session, article, paragraphs, PRIORITY_READER, tasks=READER_TASKS):
+                session.commit()
+        except Exception as e:
+            logger.error(f"第 {page_num} 页任务优先级提升失败: {e}")
+
+def _store_analysis(session: Session, paragraph_id: int, tokens: list):
+    p = session.get(Paragraph, paragraph_id)
+    if p:
+        p.analysis = tokens
+        session.add(p)
+
+# Paragraph columns a reader page shows (translation/syntax are fetched per paragraph on demand).
+# analysis is read as stored text so compact responses can pass it through without decoding.
+PAGE_COLUMNS = (
+    Paragraph.id, Paragraph.content, Paragraph.image_url, Paragraph.order_index, Paragraph.audio_path,
+    type_coerce(ParagraphPayload.analysis, Text).label("analysis"),
+)
 
 @router.get("/articles/{article_id}/page/{page_num}")
-def get_article_page(
+async def get_article_page(
     article_id: str,
     page_num: int,
-    session: Session = Depends(get_session)
+    request: Request,
+    background_tasks: BackgroundTasks,
+    defer_analysis: bool = False,
+    compact_analysis: bool = False,
+    session: AsyncSession = Depends(get_async_session)
 ):
+    """
+    defer_analysis=true returns immediately with whatever analysis exists and queues the
+    missing paragraphs for background analysis; poll /paragraphs/analysis for the results.
+    compact_analysis=true returns each analysis in the compact form of analysis_codec instead of a token list.
+    Fully processed pages are served from the page cache as pre-serialized (optionally gzipped) JSON.
+    """
+    cache_key = (article_id, page_num, compact_analysis)
+    cached = page_cache.lookup(cache_key)
+    if cached is not None:
+        # One primary key lookup: the worker process, the crawler and bulk deletes change pages too
+        version = (await session.exec(select(Article.content_version).where(Article.id == cached.article_id))).first()
+        if version == cached.version:
+            return page_cache.respond(cached, request)
+        page_cache.invalidate_article(cached.article_id)
+
     # Pagination: 20 paragraphs per page
-    limit = 20
+    limit = PAGE_SIZE
     offset = (page_num - 1) * limit
 
-    # Try to fetch by ID first
-    article = None
+    # Numeric ids are primary keys, anything else is the source's article id
     try:
-        aid = int(article_id)
-        article = session.get(Article, aid)
+        article = await session.get(Article, int(article_id))
     except ValueError:
-        # It's a string, try to find by slug
-        article = session.exec(select(Article).where(Article.source_url.contains(article_id))).first()
+        article = (await session.exec(select(Article).where(Article.external_id == article_id))).first()
 
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
 
     logger.info(f"读取文章: {article.title} (ID: {article.id}) | 第 {page_num} 页")
 
-    paragraphs = session.exec(
-        select(Paragraph)
+    # One row past the page tells whether there is a next page
+    rows = (await session.exec(
+        select(*PAGE_COLUMNS)
+        .outerjoin(ParagraphPayload, ParagraphPayload.paragraph_id == Paragraph.id)
         .where(Paragraph.article_id == article.id)
         .order_by(Paragraph.order_index)
         .offset(offset)
-        .limit(limit)
-    ).all()
+        .limit(limit + 1)
+    )).all()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
 
-    if not paragraphs:
+    if not rows:
         return {"article": article, "paragraphs": [], "has_next": False}
 
-    # Check if we need to generate analysis
-    # We check each paragraph for the 'analysis' field.
-    
+    # A reader is on this page now: its missing translation/syntax/audio jobs jump ahead of background work
+    background_tasks.add_task(_boost_page_jobs, article.id, [row.id for row in rows], page_num)
+
+    level = article.difficulty.value if article.difficulty else "Initial"
     analyzed_paragraphs = []
-    
-    for p in paragraphs:
-        if not p.analysis:
-            # Generate Full Analysis
-            try:
-                # Use article difficulty or default
-                level = article.difficulty.value if article.difficulty else "Initial"
-                analysis_json = AIService.analyze_vocabulary(p.content, level)
-                
-                if isinstance(analysis_json, list):
-                     p.analysis = json.dumps(analysis_json, ensure_ascii=False)
-                     session.add(p)
-                     # We commit immediately or batch? Commit per paragraph is safer for now.
-                     session.commit()
-                     session.refresh(p)
-                else:
-                     logger.error(f"段落 {p.id} 的分析格式无效")
-            except Exception as e:
-                logger.error(f"段落 {p.id} 分析失败: {e}")
-                # Continue without crashing, render plain text on frontend is better than 500
-        
-        # Prepare response
+    stored_analysis = False
+    for row in rows:
+        analysis = row.analysis
+        if not analysis and row.content.strip():
+            if defer_analysis:
+                analysis_queue.submit(row.id)
+            else:
+                # Generate Full Analysis
+                try:
+                    # Blocking model call, keep it off the event loop
+                    analysis_json = await run_in_threadpool(AIService.analyze_vocabulary, row.content, level)
+                    # [] is what analyze_vocabulary returns on failure: never store it as a finished analysis
+                    if usable_result(TASK_VOCABULARY, analysis_json) is not None:
+                        analysis = dumps_analysis(analysis_json)
+                        await session.run_sync(lambda s: _store_analysis(s, row.id, analysis_json))
+                        await session.commit()
+                        stored_analysis = True
+                    else:
+                        logger.error(f"段落 {row.id} 的分析格式无效")
+                except Exception as e:
+                    logger.error(f"段落 {row.id} 分析失败: {e}")
+                    # Continue without crashing, render plain text on frontend is better than 500
+
         analyzed_paragraphs.append({
-            "id": p.id,
-            "content": p.content,
-            "image_url": p.image_url,
-            "order_index": p.order_index,
-            "audio_path": p.audio_path,
-            "analysis": json.loads(p.analysis) if p.analysis else []
+            "id": row.id,
+            "content": row.content,
+            "image_url": row.image_url,
+            "order_index": row.order_index,
+            "audio_path": row.audio_path,
+            "analysis": analysis_for_output(analysis, compact_analysis),
+            "analysis_pending": not analysis and analysis_queue.is_pending(row.id)
         })
 
-    total_paras_count = session.exec(select(Paragraph).where(Paragraph.article_id == article.id)).all()
-    has_next = (offset + limit) < len(total_paras_count)
-
-    return {
+    payload = {
         "article": article,
         "page": page_num,
         "paragraphs": analyzed_paragraphs,
         "has_next": has_next
     }
+    # Once every text paragraph has its analysis and audio the page no longer changes.
+    # Not cached if this request stored analysis: that bumped content_version past article.content_version.
+    finished = not stored_analysis and all(
+        row.analysis and row.audio_path
+        for row in rows if row.content.strip()
+    )
+    return page_cache.put(cache_key, article.id, article.content_version, payload, request, cache=finished)
 
+@router.get("/paragraphs/analysis")
+async def get_paragraphs_analysis(
+    ids: List[int] = Query(...),
+    compact_analysis: bool = False,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Poll endpoint for deferred page analysis. Returns the current analysis of each requested paragraph
+    (compact_analysis as for the page endpoint).
+    """
+    paragraphs = (await session.exec(
+        select(Paragraph.id, type_coerce(ParagraphPayload.analysis, Text).label("analysis"))
+        .outerjoin(ParagraphPayload, ParagraphPayload.paragraph_id == Paragraph.id)
+        .where(Paragraph.id.in_(ids))
+    )).all()
     return {
-        "article": article,
-        "page": page_num,
-        "paragraphs": analyzed_paragraphs,
-        "has_next": has_next
+        "paragraphs": [
+            {
+                "id": p.id,
+                "analysis": analysis_for_output(p.analysis, compact_analysis),
+                "analysis_pending": not p.analysis and analysis_queue.is_pending(p.id)
+            }
+            for p in paragraphs
+        ]
     }
 
-@router.post("/analyze/translation")
-def analyze_translation(
-    paragraph_text: str,
-    session: Session = Depends(get_session)
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.get("/paragraphs/analysis/stream")
+async def stream_paragraphs_analysis(
+    ids: List[int] = Query(...),
+    session: AsyncSession = Depends(get_async_session)
 ):
-    p = session.exec(select(Paragraph).where(Paragraph.content == paragraph_text)).first()
-    
+    """
+    Server-sent events version of /paragraphs/analysis. Missing analysis is queued and streamed as it is generated:
+    - "token": {"id", "index", "token"} for every annotated word as soon as the model produced it
+    - "paragraph": {"id", "analysis", "analysis_pending"} with the stored analysis, which replaces the streamed tokens
+    - "done": {} once every requested paragraph is finished
+    """
+    paragraphs = (await session.exec(select(Paragraph).where(Paragraph.id.in_(ids)).options(selectinload(Paragraph.payload)))).all()
+    ready = [(p.id, p.analysis) for p in paragraphs if p.analysis]
+    waiting = [p.id for p in paragraphs if not p.analysis and p.content.strip()]
+    for pid in waiting:
+        analysis_queue.submit(pid)
+
+    async def events():
+        for pid, analysis in ready:
+            yield _sse("paragraph", {"id": pid, "analysis": analysis, "analysis_pending": False})
+
+        async for pid, index, token in analysis_queue.stream(waiting):
+            yield _sse("token", {"id": pid, "index": index, "token": token})
+
+        # Final state comes from the DB; the request's own session may already be closed here
+        if waiting:
+            async with AsyncSession(get_async_engine(), expire_on_commit=False) as s:
+                for p in (await s.exec(select(Paragraph).where(Paragraph.id.in_(waiting)).options(selectinload(Paragraph.payload)))).all():
+                    yield _sse("paragraph", {
+                        "id": p.id,
+                        "analysis": p.analysis or [],
+                        "analysis_pending": not p.analysis and analysis_queue.is_pending(p.id)
+                    })
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the browser as they are produced
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _find_paragraph_by_text(session: Session, text: str) -> Optional[Paragraph]:
+    # Indexed lookup by content hash instead of comparing the whole TEXT column
+    return session.exec(select(Paragraph).where(Paragraph.content_hash == hash_content(text))).first()
+
+def _get_paragraph_or_404(session: Session, paragraph_id: int) -> Paragraph:
+    p = session.get(Paragraph, paragraph_id)
+    if not p:
+        raise HTTPException(status_code=404, detail="Paragraph not found")
+    return p
+
+def _translation_for(p: Optional[Paragraph], text: str, session: Session):
     if p and p.translation:
         return {"translation": json.loads(p.translation)}
     
-    # Fallback to on-demand if missing (should not happen in eager mode)
-    translation = AIService.translate_paragraph(paragraph_text)
+    # Fallback to on-demand if the worker has not produced it yet
+    translation = AIService.translate_paragraph(text)
     
-    if p and translation and "translation" in translation and translation["translation"] != "Translation failed.":
+    # Failure placeholders are returned to the caller but never stored
+    if p and usable_result(TASK_TRANSLATION, translation) is not None:
         p.translation = json.dumps(translation, ensure_ascii=False)
         session.add(p)
         session.commit()
@@ -130,19 +308,13 @@ def analyze_translation(
     
     return {"translation": translation}
 
-@router.post("/analyze/syntax")
-def analyze_syntax(
-    paragraph_text: str,
-    session: Session = Depends(get_session)
-):
-    p = session.exec(select(Paragraph).where(Paragraph.content == paragraph_text)).first()
-    
+def _syntax_for(p: Optional[Paragraph], text: str, session: Session):
     if p and p.syntax:
         return {"syntax": json.loads(p.syntax)}
         
-    syntax = AIService.analyze_syntax(paragraph_text)
+    syntax = AIService.analyze_syntax(text)
     
-    if p and syntax and "structures" in syntax:
+    if p and usable_result(TASK_SYNTAX, syntax) is not None:
         p.syntax = json.dumps(syntax, ensure_ascii=False)
         session.add(p)
         session.commit()
@@ -150,109 +322,156 @@ def analyze_syntax(
 
     return {"syntax": syntax}
 
-@router.post("/analyze/vocabulary")
-def analyze_vocabulary(
-    paragraph_text: str,
-    level: str = "Advanced", # Default, ideally passed from frontend or article context
-    session: Session = Depends(get_session)
-):
-    p = session.exec(select(Paragraph).where(Paragraph.content == paragraph_text)).first()
-    
+def _vocabulary_for(p: Optional[Paragraph], text: str, level: str, session: Session):
     if p and p.analysis:
-        return json.loads(p.analysis)
+        return p.analysis
         
-    analysis = AIService.analyze_vocabulary(paragraph_text, level)
+    analysis = AIService.analyze_vocabulary(text, level)
     
-    if p and analysis:
-        p.analysis = json.dumps(analysis, ensure_ascii=False)
+    if p and usable_result(TASK_VOCABULARY, analysis) is not None:
+        p.analysis = analysis
         session.add(p)
         session.commit()
         session.refresh(p)
 
     return analysis
 
+@router.post("/analyze/translation")
+def analyze_translation(
+    paragraph_text: str,
+    request: Request,
+    session: Session = Depends(get_session)
+):
+    p = _find_paragraph_by_text(session, paragraph_text)
+    return etag_json_response(request, _translation_for(p, paragraph_text, session))
+
+# GET lets browsers revalidate a stored result with If-None-Match; POST is kept for existing clients
+@router.api_route("/analyze/translation/{paragraph_id}", methods=["GET", "POST"])
+def analyze_translation_by_id(
+    paragraph_id: int,
+    request: Request,
+    session: Session = Depends(get_session)
+):
+    p = _get_paragraph_or_404(session, paragraph_id)
+    return etag_json_response(request, _translation_for(p, p.content, session))
+
+@router.post("/analyze/syntax")
+def analyze_syntax(
+    paragraph_text: str,
+    request: Request,
+    session: Session = Depends(get_session)
+):
+    p = _find_paragraph_by_text(session, paragraph_text)
+    return etag_json_response(request, _syntax_for(p, paragraph_text, session))
+
+# GET lets browsers revalidate a stored result with If-None-Match; POST is kept for existing clients
+@router.api_route("/analyze/syntax/{paragraph_id}", methods=["GET", "POST"])
+def analyze_syntax_by_id(
+    paragraph_id: int,
+    request: Request,
+    session: Session = Depends(get_session)
+):
+    p = _get_paragraph_or_404(session, paragraph_id)
+    return etag_json_response(request, _syntax_for(p, p.content, session))
+
+@router.post("/analyze/vocabulary")
+def analyze_vocabulary(
+    paragraph_text: str,
+    request: Request,
+    level: str = "Advanced", # Default, ideally passed from frontend or article context
+    session: Session = Depends(get_session)
+):
+    p = _find_paragraph_by_text(session, paragraph_text)
+    return etag_json_response(request, _vocabulary_for(p, paragraph_text, level, session))
+
+@router.api_route("/analyze/vocabulary/{paragraph_id}", methods=["GET", "POST"])
+def analyze_vocabulary_by_id(
+    paragraph_id: int,
+    request: Request,
+    level: Optional[str] = None, # Defaults to the article's difficulty
+    session: Session = Depends(get_session)
+):
+    p = _get_paragraph_or_404(session, paragraph_id)
+    if not level:
+        article = session.get(Article, p.article_id)
+        level = article.difficulty.value if article and article.difficulty else "Initial"
+    return etag_json_response(request, _vocabulary_for(p, p.content, level, session))
+
 import json
 import os
 
+# Paragraph audio is written once under a stable name ({article_id}_{order_index}.mp3),
+# so clients can cache it for a long time (default: 7 days)
+AUDIO_CACHE_MAX_AGE = int(os.getenv("AUDIO_CACHE_MAX_AGE", "604800"))
+
 @router.get("/tts/paragraph")
 def get_paragraph_tts(
     text: str,
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    p = session.exec(select(Paragraph).where(Paragraph.content == text)).first()
+    p = _find_paragraph_by_text(session, text)
     if not p:
          raise HTTPException(status_code=404, detail="Paragraph not found")
 
-    return _get_or_generate_audio(p, session)
+    return _get_or_generate_audio(p, session, request)
 
 @router.get("/tts/{paragraph_id}")
 def get_tts_by_id(
     paragraph_id: int,
+    request: Request,
     session: Session = Depends(get_session)
 ):
-    p = session.get(Paragraph, paragraph_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="Paragraph not found")
-        
-    return _get_or_generate_audio(p, session)
+    p = _get_paragraph_or_404(session, paragraph_id)
+    return _get_or_generate_audio(p, session, request)
 
-def _get_or_generate_audio(p: Paragraph, session: Session):
+def _audio_file_response(path: str, request: Request):
+    """
+    Streams the file from disk. FileResponse handles Range/If-Range, ETag and Last-Modified;
+    conditional requests that still match are answered with 304 here.
+    """
+    response = FileResponse(path, media_type="audio/mpeg", stat_result=os.stat(path))
+    response.headers["Cache-Control"] = f"public, max-age={AUDIO_CACHE_MAX_AGE}"
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if (if_none_match and response.headers["etag"] in [t.strip() for t in if_none_match.split(",")]) or \
+            (not if_none_match and if_modified_since == response.headers["last-modified"]):
+        return Response(status_code=304, headers={
+            "ETag": response.headers["etag"],
+            "Last-Modified": response.headers["last-modified"],
+            "Cache-Control": response.headers["Cache-Control"],
+        })
+    return response
+
+def _get_or_generate_audio(p: Paragraph, session: Session, request: Request):
     """
     Helper to check if audio exists, and if not, generate it immediately.
+    Concurrent requests for the same paragraph (and the crawler) share one TTS call.
     """
-    # 1. Resolve Static Directory
-    static_dir = os.getenv("STATIC_DIR", "static")
-    if not os.path.isabs(static_dir):
-        static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), static_dir)
-    
-    # 2. Determine Expected File Path
-    # Naming convention: static/audio/{article_id}/{article_id}_{order_index}.mp3
-    # We match what the crawler does: 
-    #   article_audio_dir = os.path.join(AUDIO_DIR, str(article.id))
-    #   filename = f"{article.id}_{p.order_index}.mp3"
-    
-    audio_relative_dir = os.path.join("audio", str(p.article_id))
-    filename = f"{p.article_id}_{p.order_index}.mp3"
-    
-    # Absolute path for file operations
-    audio_dir_abs = os.path.join(static_dir, audio_relative_dir)
-    audio_file_abs = os.path.join(audio_dir_abs, filename)
-    
-    # DB stored relative path example: static/audio/123/123_1.mp3
-    # We want to be consistent with how we store it.
-    # But wait, the crawler stores "static/audio/..." 
-    # Let's standardize on storing "static/audio/{article_id}/{filename}" for db persistence compatibility
-    
-    # 3. Check if file exists
+    audio_file_abs, rel_path_for_db = paragraph_audio_paths(p.article_id, p.order_index)
+
     if os.path.exists(audio_file_abs):
-        with open(audio_file_abs, "rb") as f:
-            return Response(content=f.read(), media_type="audio/mpeg")
+        return _audio_file_response(audio_file_abs, request)
             
-    # 4. Not found? GENERATE IT.
+    # Not found? GENERATE IT.
     logger.info(f"段落 {p.id} 缺少音频。正在按需生成...")
     
     try:
-        audio_bytes = AIService.generate_tts(p.content)
-        if audio_bytes:
-            # Ensure dir exists
-            os.makedirs(audio_dir_abs, exist_ok=True)
-            
-            # Save file
-            with open(audio_file_abs, "wb") as f:
-                f.write(audio_bytes)
-            
-            # Update DB (if path wasn't set or was wrong)
-            # The DB path conventionally includes "static/" prefix in this codebase unfortunately
-            rel_path_for_db = os.path.join("static", "audio", str(p.article_id), filename)
-            p.audio_path = rel_path_for_db
-            session.add(p)
-            session.commit()
-            session.refresh(p)
-            
-            return Response(content=audio_bytes, media_type="audio/mpeg")
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate audio from AI service")
-            
+        audio_file_abs = ensure_paragraph_audio(p.article_id, p.order_index, p.content, generate=AIService.generate_tts)
     except Exception as e:
         logger.error(f"按需生成 TTS 失败: {e}")
         raise HTTPException(status_code=500, detail=f"TTS Generation failed: {str(e)}")
+
+    if not audio_file_abs:
+        raise HTTPException(status_code=500, detail="Failed to generate audio from AI service")
+
+    # Update DB (if path wasn't set or was wrong)
+    # The DB path conventionally includes "static/" prefix in this codebase unfortunately
+    if p.audio_path != rel_path_for_db:
+        p.audio_path = rel_path_for_db
+        session.add(p)
+        session.commit()
+        session.refresh(p)
+
+    return _audio_file_response(audio_file_abs, request)
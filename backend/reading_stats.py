@@ -0,0 +1,77 @@
+from datetime import date
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update
+from database import IS_SQLITE
+from models import ReadingRecord, ReadingMonth
+
+if IS_SQLITE:
+    from sqlalchemy.dialects.sqlite import insert
+else:
+    from sqlalchemy.dialects.postgresql import insert
+
+
+# Years the range queries can express (they end at January 1st of the next year)
+MIN_YEAR, MAX_YEAR = 1, 9998
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(month: date) -> date:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+async def add_reading(session: AsyncSession, user_id: int, day: date, words: int):
+    """
+    Adds words to the user's day and month. Concurrent calls are safe: the unique (user_id, date) index
+    decides which one creates the day, the others add to it. The caller commits.
+    """
+    created = await session.execute(
+        insert(ReadingRecord)
+        .values(user_id=user_id, date=day, words_read=words)
+        .on_conflict_do_nothing(index_elements=["user_id", "date"])
+    )
+    new_day = created.rowcount == 1
+    if not new_day:
+        await session.execute(
+            update(ReadingRecord)
+            .where(ReadingRecord.user_id == user_id, ReadingRecord.date == day)
+            .values(words_read=ReadingRecord.words_read + words)
+        )
+
+    month = insert(ReadingMonth).values(user_id=user_id, month=_month_start(day), days_read=int(new_day), words_read=words)
+    await session.execute(month.on_conflict_do_update(
+        index_elements=["user_id", "month"],
+        set_={
+            "days_read": ReadingMonth.days_read + month.excluded.days_read,
+            "words_read": ReadingMonth.words_read + month.excluded.words_read,
+        },
+    ))
+
+
+async def month_records(session: AsyncSession, user_id: int, year: int, month: int):
+    """Daily records of one month: a range scan on the (user_id, date) index."""
+    start = date(year, month, 1)
+    return (await session.exec(
+        select(ReadingRecord)
+        .where(ReadingRecord.user_id == user_id, ReadingRecord.date >= start, ReadingRecord.date < _next_month(start))
+        .order_by(ReadingRecord.date)
+    )).all()
+
+
+async def year_summary(session: AsyncSession, user_id: int, year: int) -> dict:
+    """Yearly totals and per-month rollups, read from at most 12 ReadingMonth rows."""
+    months = (await session.exec(
+        select(ReadingMonth)
+        .where(ReadingMonth.user_id == user_id, ReadingMonth.month >= date(year, 1, 1), ReadingMonth.month < date(year + 1, 1, 1))
+        .order_by(ReadingMonth.month)
+    )).all()
+    return {
+        "year": year,
+        "days_read": sum(m.days_read for m in months),
+        "words_read": sum(m.words_read for m in months),
+        "months": [{"month": m.month.month, "days_read": m.days_read, "words_read": m.words_read} for m in months],
+    }
@@ -0,0 +1,103 @@
+import os
+import shutil
+import logging
+import threading
+from datetime import datetime
+
+from sqlmodel import Session, select
+from sqlalchemy import delete, or_
+from database import engine
+from models import Article, Paragraph, ParagraphPayload
+from audio_store import AUDIO_DIR
+from job_queue import delete_article_jobs
+
+logger = logging.getLogger(__name__)
+
+# Expired articles deleted per transaction; keeps the write lock short however much has expired
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+
+
+def purge_expired_articles(cutoff: datetime, batch_size: int = RETENTION_BATCH_SIZE) -> dict:
+    """
+    Deletes articles published before cutoff (or never) with their paragraphs, payloads and jobs,
+    using set-based DELETEs in batches; no ORM objects are loaded. Audio files are left to sweep_orphan_audio.
+    Returns the number of deleted rows per table.
+    """
+    expired = select(Article.id).where(or_(Article.published_at < cutoff, Article.published_at == None))
+    stats = {"articles": 0, "paragraphs": 0, "payloads": 0}
+
+    while True:
+        with Session(engine) as session:
+            # Uses ix_article_published_at; each batch is a bounded index range scan
+            article_ids = session.exec(expired.limit(batch_size)).all()
+            if not article_ids:
+                break
+            paragraph_ids = select(Paragraph.id).where(Paragraph.article_id.in_(article_ids))
+            stats["payloads"] += session.execute(delete(ParagraphPayload).where(ParagraphPayload.paragraph_id.in_(paragraph_ids))).rowcount
+            stats["paragraphs"] += session.execute(delete(Paragraph).where(Paragraph.article_id.in_(article_ids))).rowcount
+            stats["articles"] += session.execute(delete(Article).where(Article.id.in_(article_ids))).rowcount
+            delete_article_jobs(session, article_ids)
+            session.commit()
+        if len(article_ids) < batch_size:
+            break
+
+    logger.info(f"数据清理完成: 删除 {stats['articles']} 篇文章, {stats['paragraphs']} 个段落, {stats['payloads']} 条分析数据")
+    return stats
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def sweep_orphan_audio() -> dict:
+    """
+    Removes audio directories (static/audio/{article_id}) whose article no longer exists.
+    Also picks up directories left behind by earlier failed cleanups or by TTS that finished after a delete.
+    Returns the number of removed directories and freed bytes.
+    """
+    stats = {"directories": 0, "bytes": 0}
+    if not os.path.isdir(AUDIO_DIR):
+        return stats
+
+    dir_ids = {int(name) for name in os.listdir(AUDIO_DIR) if name.isdigit()}
+    if not dir_ids:
+        return stats
+    with Session(engine) as session:
+        existing = set()
+        id_list = list(dir_ids)
+        # Chunked to stay below SQLite's bound parameter limit
+        for i in range(0, len(id_list), 500):
+            existing.update(session.exec(select(Article.id).where(Article.id.in_(id_list[i:i + 500]))).all())
+
+    for article_id in sorted(dir_ids - existing):
+        path = os.path.join(AUDIO_DIR, str(article_id))
+        try:
+            size = _dir_size(path)
+            shutil.rmtree(path)
+            stats["directories"] += 1
+            stats["bytes"] += size
+        except Exception as e:
+            logger.error(f"删除文章 {article_id} 的音频目录失败: {e}")
+
+    logger.info(f"音频清理完成: 删除 {stats['directories']} 个目录, 释放 {stats['bytes'] / 1024 / 1024:.1f} MB")
+    return stats
+
+
+def start_audio_sweeper() -> threading.Thread:
+    """Runs sweep_orphan_audio in a background thread so file removal does not hold up the crawl."""
+    def _run():
+        try:
+            sweep_orphan_audio()
+        except Exception as e:
+            logger.error(f"音频清理失败: {e}")
+
+    thread = threading.Thread(target=_run, name="audio-sweeper")
+    thread.start()
+    return thread
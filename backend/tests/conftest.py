@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+import pytest
+
+# Backend modules read their configuration at import time: point them at a throwaway database and static dir
+# before any test module imports them.
+_tmp_dir = tempfile.mkdtemp(prefix="readally-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+os.environ["STATIC_DIR"] = os.path.join(_tmp_dir, "static")
+
+
+@pytest.fixture
+def session():
+    """Session on empty tables; the tables are dropped again after the test."""
+    from sqlmodel import SQLModel, Session
+    from database import engine
+    import models  # noqa: F401  (registers all tables)
+
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db_session:
+        yield db_session
+    SQLModel.metadata.drop_all(engine)
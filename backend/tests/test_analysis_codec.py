@@ -0,0 +1,60 @@
+import json
+
+from analysis_codec import (
+    CompactAnalysis, analysis_for_output, decode_compact, dumps_analysis, encode_compact, loads_analysis,
+)
+
+TOKENS = [
+    {"text": "The", "type": "normal", "definition": "", "context_meaning": "", "group_id": None},
+    {"text": "take", "type": "phrase", "definition": "拿", "context_meaning": "接手", "group_id": 1},
+    {"text": "over", "type": "phrase", "definition": "", "context_meaning": "接手", "group_id": 1},
+    {"text": "The", "type": "normal", "definition": "", "context_meaning": "", "group_id": None},
+]
+
+
+def test_round_trip():
+    assert decode_compact(encode_compact(TOKENS)) == TOKENS
+    assert loads_analysis(dumps_analysis(TOKENS)) == TOKENS
+
+
+def test_strings_and_types_are_stored_once():
+    compact = encode_compact(TOKENS)
+    assert compact["s"].count("The") == 1 and compact["s"].count("接手") == 1
+    assert compact["k"] == ["normal", "phrase"]
+    assert compact["w"][0] == compact["w"][3]
+
+
+def test_group_ids_are_omitted_when_unused():
+    tokens = [dict(token, group_id=None) for token in TOKENS]
+    compact = encode_compact(tokens)
+    assert "g" not in compact
+    assert decode_compact(compact) == tokens
+
+
+def test_tokens_outside_the_schema_are_stored_plain():
+    tokens = [{"text": "x", "type": "normal", "extra": 1}]
+    assert encode_compact(tokens) is None
+    assert json.loads(dumps_analysis(tokens)) == tokens
+    assert loads_analysis(dumps_analysis(tokens)) == tokens
+
+
+def test_plain_json_rows_are_still_readable():
+    assert loads_analysis(json.dumps(TOKENS)) == TOKENS
+
+
+def test_column_type_round_trip():
+    column = CompactAnalysis()
+    stored = column.process_bind_param(TOKENS, None)
+    assert isinstance(json.loads(stored), dict)
+    assert column.process_result_value(stored, None) == TOKENS
+    # JSON text is accepted on write too
+    assert column.process_bind_param(json.dumps(TOKENS), None) == stored
+    assert column.process_bind_param(None, None) is None
+
+
+def test_analysis_for_output():
+    stored = dumps_analysis(TOKENS)
+    assert analysis_for_output(stored) == TOKENS
+    assert analysis_for_output(stored, compact=True) == json.loads(stored)
+    assert analysis_for_output(json.dumps(TOKENS), compact=True) == encode_compact(TOKENS)
+    assert analysis_for_output(None) == []
@@ -0,0 +1,78 @@
+import io
+import wave
+
+import pytest
+
+from audio_concat import concat_audio, mp3_frames
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo, no padding: 417-byte frames
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_LENGTH = 417
+SIDE_INFO = 32
+
+
+def mp3_frame(fill: int) -> bytes:
+    return FRAME_HEADER + bytes([fill]) * (FRAME_LENGTH - 4)
+
+
+def info_frame(tag: bytes = b"Info") -> bytes:
+    body = bytearray(FRAME_LENGTH - 4)
+    body[SIDE_INFO:SIDE_INFO + 4] = tag
+    return FRAME_HEADER + bytes(body)
+
+
+def id3v2(payload: bytes = b"\x00" * 20) -> bytes:
+    size = len(payload)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x04\x00\x00" + syncsafe + payload
+
+
+def id3v1() -> bytes:
+    return b"TAG" + b"\x00" * 125
+
+
+def wav(frames: bytes, channels: int = 1, width: int = 2, rate: int = 16000) -> bytes:
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return out.getvalue()
+
+
+def test_mp3_frames_strips_tags_and_info_frame():
+    data = id3v2() + info_frame() + mp3_frame(1) + mp3_frame(2) + id3v1()
+    assert mp3_frames(data) == [mp3_frame(1), mp3_frame(2)]
+
+
+def test_mp3_frames_strips_xing_frame():
+    assert mp3_frames(info_frame(b"Xing") + mp3_frame(1)) == [mp3_frame(1)]
+
+
+def test_mp3_frames_resyncs_after_junk():
+    assert mp3_frames(mp3_frame(1) + b"junk" + mp3_frame(2)) == [mp3_frame(1), mp3_frame(2)]
+
+
+def test_concat_mp3_keeps_only_audio_frames():
+    part = lambda n: id3v2() + info_frame() + mp3_frame(n) + id3v1()
+    assert concat_audio([part(1), part(2), part(3)]) == mp3_frame(1) + mp3_frame(2) + mp3_frame(3)
+
+
+def test_concat_single_part_is_unchanged():
+    data = id3v2() + mp3_frame(1)
+    assert concat_audio([data]) == data
+
+
+def test_concat_wav_merges_under_one_header():
+    merged = concat_audio([wav(b"\x01\x00" * 100), wav(b"\x02\x00" * 50)])
+    assert merged.count(b"RIFF") == 1
+    with wave.open(io.BytesIO(merged), "rb") as w:
+        assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, 16000)
+        assert w.getnframes() == 150
+        assert w.readframes(150) == b"\x01\x00" * 100 + b"\x02\x00" * 50
+
+
+def test_concat_wav_rejects_mixed_formats():
+    with pytest.raises(ValueError):
+        concat_audio([wav(b"\x00\x00", rate=16000), wav(b"\x00\x00", rate=22050)])
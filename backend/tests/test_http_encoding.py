@@ -0,0 +1,44 @@
+from starlette.requests import Request
+
+from http_encoding import etag_for, etag_json_response, if_none_match
+
+ETAG = '"abc123"'
+
+
+def request(if_none_match_header=None) -> Request:
+    headers = [] if if_none_match_header is None else [(b"if-none-match", if_none_match_header.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_no_header():
+    assert not if_none_match(request(), ETAG)
+
+
+def test_exact_and_weak_match():
+    assert if_none_match(request('"abc123"'), ETAG)
+    assert if_none_match(request('W/"abc123"'), ETAG)
+    assert if_none_match(request('"abc123"'), 'W/"abc123"')
+
+
+def test_encoded_variants_match():
+    assert if_none_match(request('"abc123-gzip"'), ETAG)
+    assert if_none_match(request('W/"abc123-br"'), ETAG)
+    assert not if_none_match(request('"abc123-deflate"'), ETAG)
+
+
+def test_list_and_wildcard():
+    assert if_none_match(request('"other", "abc123"'), ETAG)
+    assert if_none_match(request("*"), ETAG)
+    assert not if_none_match(request('"other", W/"abc"'), ETAG)
+
+
+def test_etag_json_response_revalidates():
+    payload = {"items": [1, 2, 3]}
+    first = etag_json_response(request(), payload)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag == etag_for(first.body)
+
+    again = etag_json_response(request(etag), payload)
+    assert again.status_code == 304 and again.headers["etag"] == etag
+    assert etag_json_response(request(etag), {"items": []}).status_code == 200
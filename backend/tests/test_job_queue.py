@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+from sqlmodel import select
+
+from job_queue import (
+    enqueue_paragraphs, lease_jobs, extend_leases, complete_job, fail_job,
+    JOB_RETRY_DELAY, JOB_REQUEUE_COOLDOWN,
+)
+from models import Article, Paragraph, ProcessingJob, JobStatus
+
+
+def add_jobs(session, *priorities):
+    jobs = [ProcessingJob(paragraph_id=n + 1, article_id=1, task="translation", priority=p) for n, p in enumerate(priorities)]
+    session.add_all(jobs)
+    session.commit()
+    return jobs
+
+
+def test_lease_claims_highest_priority_first(session):
+    add_jobs(session, 0, 100, 50)
+    jobs = lease_jobs(session, "w1", 2)
+    assert [job.priority for job in jobs] == [100, 50]
+    assert all(job.status == JobStatus.RUNNING and job.lease_owner == "w1" and job.attempts == 1 for job in jobs)
+
+
+def test_leased_jobs_are_not_handed_out_twice(session):
+    add_jobs(session, 0, 0)
+    first = lease_jobs(session, "w1", 1)
+    second = lease_jobs(session, "w2", 5)
+    assert len(first) == 1 and len(second) == 1
+    assert first[0].id != second[0].id
+    assert lease_jobs(session, "w3", 5) == []
+
+
+def test_priority_range_and_exclusions(session):
+    low, high = add_jobs(session, 0, 100)
+    assert [job.id for job in lease_jobs(session, "w1", 5, max_priority=0)] == [low.id]
+    assert lease_jobs(session, "w1", 5, min_priority=1, exclude_ids=[high.id]) == []
+
+
+def test_expired_lease_is_handed_out_again(session):
+    add_jobs(session, 0)
+    [job] = lease_jobs(session, "w1", 1, lease_seconds=-1)
+    [again] = lease_jobs(session, "w2", 1)
+    assert again.id == job.id
+    assert again.lease_owner == "w2" and again.attempts == 2
+
+
+def test_extend_leases_only_renews_own_jobs(session):
+    add_jobs(session, 0)
+    [job] = lease_jobs(session, "w1", 1, lease_seconds=-1)
+    assert extend_leases(session, "w2", [job.id]) == 0
+    assert extend_leases(session, "w1", [job.id]) == 1
+    assert lease_jobs(session, "w2", 1) == []
+
+
+def test_complete_job(session):
+    add_jobs(session, 0)
+    [job] = lease_jobs(session, "w1", 1)
+    complete_job(session, job)
+    session.commit()
+    session.refresh(job)
+    assert job.status == JobStatus.DONE and job.lease_owner is None
+    assert lease_jobs(session, "w1", 1) == []
+
+
+def test_fail_job_backs_off_then_gives_up(session):
+    add_jobs(session, 0)
+    [job] = lease_jobs(session, "w1", 1)
+    before = datetime.utcnow()
+    fail_job(session, job, "boom", max_attempts=2)
+    session.commit()
+    assert job.status == JobStatus.PENDING and job.last_error == "boom"
+    assert job.available_at >= before + timedelta(seconds=JOB_RETRY_DELAY)
+    assert lease_jobs(session, "w1", 1) == []
+
+    job.available_at = before
+    session.add(job)
+    session.commit()
+    [job] = lease_jobs(session, "w1", 1)
+    fail_job(session, job, "boom again", max_attempts=2)
+    session.commit()
+    assert job.status == JobStatus.FAILED and job.attempts == 2
+
+
+def test_enqueue_leaves_recently_failed_jobs_alone(session):
+    article = Article(title="A")
+    session.add(article)
+    session.commit()
+    session.add(Paragraph(article_id=article.id, order_index=0, content="Hello world."))
+    session.commit()
+    paragraphs = session.exec(select(Paragraph)).all()
+
+    created = enqueue_paragraphs(session, article, paragraphs)
+    session.commit()
+    jobs = session.exec(select(ProcessingJob)).all()
+    assert created == len(jobs) > 0
+    for job in jobs:
+        job.status, job.attempts = JobStatus.FAILED, 5
+        session.add(job)
+    session.commit()
+    assert enqueue_paragraphs(session, article, paragraphs, priority=100) == 0
+
+    for job in jobs:
+        job.updated_at = datetime.utcnow() - timedelta(seconds=JOB_REQUEUE_COOLDOWN + 1)
+        session.add(job)
+    session.commit()
+    assert enqueue_paragraphs(session, article, paragraphs, priority=100) == len(jobs)
+    session.commit()
+    assert all(job.status == JobStatus.PENDING and job.attempts == 5 and job.priority == 100 for job in jobs)
@@ -0,0 +1,64 @@
+import pytest
+
+from llm_json import JsonArrayStream, parse_llm_json
+
+
+def test_parse_fenced_answer():
+    text = 'Here you go:\n```json\n[{"a": 1}, {"a": 2}]\n```\nDone.'
+    assert parse_llm_json(text) == ([{"a": 1}, {"a": 2}], True)
+
+
+def test_parse_object():
+    assert parse_llm_json('Result: {"x": [1, 2]}', expected=dict) == ({"x": [1, 2]}, True)
+
+
+def test_parse_skips_bracketed_prose():
+    assert parse_llm_json("See [note] below: [1, 2]") == ([1, 2], True)
+
+
+def test_truncated_array_drops_cut_off_element():
+    assert parse_llm_json('[{"a": 1}, {"a": 2}, {"a": ') == ([{"a": 1}, {"a": 2}], False)
+
+
+def test_truncated_inside_string_drops_cut_off_element():
+    assert parse_llm_json('[{"a": "x"}, {"a": "hel') == ([{"a": "x"}], False)
+
+
+def test_truncated_after_complete_element():
+    assert parse_llm_json('[{"a": 1}, {"a": 2},') == ([{"a": 1}, {"a": 2}], False)
+
+
+def test_truncated_scalar_array_keeps_complete_strings():
+    assert parse_llm_json('["a", "b", "c') == (["a", "b"], False)
+
+
+def test_truncated_object_drops_cut_off_member():
+    assert parse_llm_json('{"x": [1, 2], "y": {"z": 1', expected=dict) == ({"x": [1, 2]}, False)
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        parse_llm_json("Sorry, I cannot help with that.")
+
+
+def test_stream_emits_elements_as_they_complete():
+    stream = JsonArrayStream()
+    assert stream.feed('```json\n[{"a": ') == []
+    assert stream.feed('1}, {"b": "x,]"') == [{"a": 1}]
+    assert stream.feed('}, 3, "s"') == [{"b": "x,]"}, 3]
+    assert not stream.complete
+    assert stream.feed(']\n```') == ["s"]
+    assert stream.complete
+    assert stream.feed('[{"c": 1}]') == []
+
+
+def test_stream_never_emits_cut_off_element():
+    stream = JsonArrayStream()
+    assert stream.feed('[{"a": 1}, {"a": ') == [{"a": 1}]
+    assert stream.feed('"unfinished') == []
+    assert not stream.complete
+
+
+def test_stream_handles_escaped_quotes():
+    stream = JsonArrayStream()
+    assert stream.feed('["say \\"hi\\"", {"q": "a\\\\"}]') == ['say "hi"', {"q": "a\\"}]
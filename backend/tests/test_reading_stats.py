@@ -0,0 +1,75 @@
+import asyncio
+from datetime import date
+
+import pytest
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import get_async_engine
+from models import ReadingRecord, ReadingMonth
+from reading_stats import add_reading, month_records, year_summary
+
+
+@pytest.fixture
+def run(session):
+    """Runs a coroutine with an AsyncSession on the test database."""
+    def _run(fn):
+        async def main():
+            engine = get_async_engine()
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as async_session:
+                    return await fn(async_session)
+            finally:
+                # Pooled connections belong to this event loop
+                await engine.dispose()
+        return asyncio.run(main())
+    return _run
+
+
+async def _read(session: AsyncSession, days):
+    for user_id, day, words in days:
+        await add_reading(session, user_id, day, words)
+        await session.commit()
+    records = (await session.exec(select(ReadingRecord).order_by(ReadingRecord.user_id, ReadingRecord.date))).all()
+    months = (await session.exec(select(ReadingMonth).order_by(ReadingMonth.user_id, ReadingMonth.month))).all()
+    return [(r.user_id, r.date, r.words_read) for r in records], [(m.user_id, m.month, m.days_read, m.words_read) for m in months]
+
+
+def test_same_day_is_added_to_one_record(run):
+    records, months = run(lambda s: _read(s, [(1, date(2025, 3, 4), 100), (1, date(2025, 3, 4), 50)]))
+    assert records == [(1, date(2025, 3, 4), 150)]
+    assert months == [(1, date(2025, 3, 1), 1, 150)]
+
+
+def test_month_rollup_counts_days_and_words(run):
+    records, months = run(lambda s: _read(s, [
+        (1, date(2025, 3, 4), 100),
+        (1, date(2025, 3, 5), 30),
+        (1, date(2025, 3, 5), 20),
+        (1, date(2025, 4, 1), 7),
+        (2, date(2025, 3, 4), 5),
+    ]))
+    assert len(records) == 4
+    assert months == [
+        (1, date(2025, 3, 1), 2, 150),
+        (1, date(2025, 4, 1), 1, 7),
+        (2, date(2025, 3, 1), 1, 5),
+    ]
+
+
+def test_month_records_and_year_summary(run):
+    async def scenario(session):
+        for day, words in [(date(2024, 12, 31), 9), (date(2025, 1, 1), 10), (date(2025, 1, 31), 20), (date(2025, 2, 1), 30)]:
+            await add_reading(session, 1, day, words)
+        await session.commit()
+        january = await month_records(session, 1, 2025, 1)
+        return [(r.date, r.words_read) for r in january], await year_summary(session, 1, 2025)
+
+    january, summary = run(scenario)
+    assert january == [(date(2025, 1, 1), 10), (date(2025, 1, 31), 20)]
+    assert summary == {
+        "year": 2025,
+        "days_read": 3,
+        "words_read": 60,
+        "months": [{"month": 1, "days_read": 2, "words_read": 30}, {"month": 2, "days_read": 1, "words_read": 30}],
+    }
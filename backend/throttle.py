@@ -0,0 +1,56 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are refilled per second, up to `capacity`.
+    acquire() blocks until a token is available, so callers are smoothed to the target rate
+    instead of sleeping a fixed interval after every call.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ModelThrottle:
+    """
+    Per-model limiter: at most `max_in_flight` concurrent calls, started at no more than
+    `rate` calls per second. Use as a context manager around a single API call.
+    """
+
+    def __init__(self, max_in_flight: int, rate: float, burst: float = None):
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._bucket = TokenBucket(rate, burst)
+
+    def __enter__(self):
+        self._slots.acquire()
+        try:
+            self._bucket.acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._slots.release()
+        return False
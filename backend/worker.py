@@ -0,0 +1,177 @@
+"""
+Standalone AI processing worker.
+
+    python worker.py              # process jobs and run the daily Shanbay crawl
+    python worker.py --no-crawl   # process jobs only (additional workers, on any host sharing the DB)
+
+Jobs live in the processingjob table, so any number of workers can run side by side and a restarted
+worker picks up exactly where the previous one stopped (expired leases are handed out again).
+Jobs run in priority order: pages readers are opening, then the first page of new articles, then the rest.
+"""
+import os
+import sys
+import socket
+import signal
+import argparse
+import logging
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta, timezone
+
+from sqlmodel import Session
+from database import engine
+from migrate import run_migrations
+from models import ProcessingJob
+from job_queue import (
+    lease_jobs, extend_leases, complete_job, fail_job, work_items_for, queue_stats,
+    PRIORITY_BACKGROUND, JOB_LEASE_SECONDS,
+)
+from processing import group_work, run_group, apply_results, PIPELINE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+CN_TZ = timezone(timedelta(hours=8))
+
+# Jobs a worker process runs at the same time (each group of batched jobs takes one thread)
+WORKER_MAX_IN_FLIGHT = int(os.getenv("WORKER_MAX_IN_FLIGHT", str(PIPELINE_WORKERS * 2)))
+# In-flight slots background jobs never take, so jobs for pages readers are opening start right away
+WORKER_RESERVED_SLOTS = int(os.getenv("WORKER_RESERVED_SLOTS", "6"))
+# Seconds to wait before looking again when the queue is empty
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+# While jobs are running, new high priority jobs are looked for at least this often (seconds)
+WORKER_BUSY_POLL_INTERVAL = 1.0
+# Leases of running jobs are renewed this often, well before they expire
+LEASE_RENEW_INTERVAL = JOB_LEASE_SECONDS / 3
+
+
+class Worker:
+    """
+    Keeps up to max_in_flight jobs running and leases the next highest-priority job as soon as a slot frees,
+    so a page a reader just opened does not wait for a whole round of background work.
+    Background jobs (priority 0) only fill the slots above the reserved ones, i.e. idle capacity.
+    """
+
+    def __init__(self, worker_id: str, max_in_flight: int = WORKER_MAX_IN_FLIGHT, reserved_slots: int = WORKER_RESERVED_SLOTS):
+        self.worker_id = worker_id
+        self.max_in_flight = max_in_flight
+        self.reserved_slots = min(reserved_slots, max_in_flight - 1)
+        self._running = {}  # (paragraph_id, task) -> (job id, priority)
+        self._leases_renewed_at = time.monotonic()
+
+    def _lease(self, session: Session):
+        free = self.max_in_flight - len(self._running)
+        if free <= 0:
+            return []
+        running_ids = [job_id for job_id, _ in self._running.values()]
+        jobs = lease_jobs(session, self.worker_id, free, min_priority=PRIORITY_BACKGROUND + 1, exclude_ids=running_ids)
+
+        background_running = sum(1 for _, priority in self._running.values() if priority <= PRIORITY_BACKGROUND)
+        background_free = min(
+            free - len(jobs),
+            self.max_in_flight - self.reserved_slots - background_running,
+        )
+        if background_free > 0:
+            jobs += lease_jobs(session, self.worker_id, background_free, max_priority=PRIORITY_BACKGROUND, exclude_ids=running_ids)
+        return jobs
+
+    def _renew_leases(self, session: Session):
+        if not self._running or time.monotonic() - self._leases_renewed_at < LEASE_RENEW_INTERVAL:
+            return
+        extend_leases(session, self.worker_id, [job_id for job_id, _ in self._running.values()])
+        self._leases_renewed_at = time.monotonic()
+
+    def _finish(self, session: Session, group, values, error):
+        def on_result(item, item_error):
+            running = self._running.pop((item.paragraph_id, item.task), None)
+            job = running and session.get(ProcessingJob, running[0])
+            if job is None:
+                return
+            if item_error is None:
+                complete_job(session, job)
+            else:
+                fail_job(session, job, item_error)
+
+        apply_results(session, group, values, error, on_result)
+
+    def run(self, stop: threading.Event):
+        logger.info(f"处理任务 worker {self.worker_id} 已启动")
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="job") as executor:
+            while futures or not stop.is_set():
+                try:
+                    with Session(engine) as session:
+                        if not stop.is_set():
+                            jobs = self._lease(session)
+                            items, job_by_item = work_items_for(session, jobs)
+                            for key, job in job_by_item.items():
+                                self._running[key] = (job.id, job.priority)
+                            for group in group_work(items):
+                                futures[executor.submit(run_group, group)] = group
+                            if jobs:
+                                logger.debug(f"已领取 {len(jobs)} 个任务，运行中 {len(self._running)}，队列状态: {queue_stats(session)}")
+
+                        if not futures:
+                            stop.wait(WORKER_POLL_INTERVAL)
+                            continue
+
+                        self._renew_leases(session)
+                        done, _ = wait(futures, timeout=WORKER_BUSY_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            group = futures.pop(future)
+                            try:
+                                values, error = future.result(), None
+                            except Exception as e:
+                                values, error = None, str(e)
+                            self._finish(session, group, values, error)
+                        if done:
+                            session.commit()
+                except Exception as e:
+                    logger.error(f"worker 处理异常: {e}")
+                    stop.wait(WORKER_POLL_INTERVAL)
+        logger.info(f"处理任务 worker {self.worker_id} 已停止")
+
+
+def run_worker(worker_id: str, stop: threading.Event):
+    Worker(worker_id).run(stop)
+
+
+def start_worker_thread(stop: threading.Event) -> threading.Thread:
+    """Runs the worker loop in a daemon thread (used by the API process when EMBEDDED_WORKER is on)."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:embedded"
+    thread = threading.Thread(target=run_worker, args=(worker_id, stop), name="job-worker", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_crawl_scheduler():
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from crawler.shanbay import fetch_shanbay_articles
+
+    scheduler = BackgroundScheduler()
+    # Schedule Shanbay crawler at 10:00 AM daily
+    scheduler.add_job(fetch_shanbay_articles, 'cron', hour=10, minute=0, timezone=CN_TZ)
+    scheduler.start()
+    logger.info("调度器已启动。扇贝爬虫设置为每日上午 10:00 运行。")
+    return scheduler
+
+
+if __name__ == "__main__":
+    from log_conf import setup_logging
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="ReadAlly.AI processing worker")
+    parser.add_argument("--no-crawl", action="store_true", help="only process jobs, do not schedule the daily crawl")
+    args = parser.parse_args()
+
+    run_migrations()
+    if not args.no_crawl:
+        start_crawl_scheduler()
+
+    stop = threading.Event()
+    # Finish the running jobs on SIGTERM/SIGINT; jobs of a killed worker are re-leased once their lease expires
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    run_worker(f"{socket.gethostname()}:{os.getpid()}", stop)
+    sys.exit(0)
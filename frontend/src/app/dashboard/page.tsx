@@ -11,6 +11,10 @@ import StreakCalendar from '@/components/dashboard/StreakCalendar';
 export default function DashboardScreen() {
     useTheme('light');
     const [articles, setArticles] = useState<any[]>([]);
+    const [heroArticle, setHeroArticle] = useState<any>(null);
+    // pageCursors[i] is the cursor that loads page i + 1 (null for the first page)
+    const [pageCursors, setPageCursors] = useState<(string | null)[]>([null]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [stats, setStats] = useState({ wordsRead: 0, streak: 0 });
     const [selectedDifficulty, setSelectedDifficulty] = useState<string>('All');
     const [loading, setLoading] = useState(true);
@@ -19,10 +23,18 @@ export default function DashboardScreen() {
 
     const ITEMS_PER_PAGE = 20;
 
-    const fetchArticles = async () => {
+    const fetchArticles = async (difficulty: string, cursor: string | null) => {
         try {
-            const res = await api.get('/api/articles');
-            setArticles(res.data);
+            const res = await api.get('/api/articles', {
+                params: {
+                    limit: ITEMS_PER_PAGE,
+                    difficulty: difficulty === 'All' ? undefined : difficulty,
+                    cursor: cursor ?? undefined,
+                }
+            });
+            setArticles(res.data.items);
+            setNextCursor(res.data.next_cursor);
+            if (difficulty === 'All' && !cursor) setHeroArticle(res.data.items[0] ?? null);
         } catch (e) {
             console.error("Failed to fetch articles");
         }
@@ -40,7 +52,7 @@ export default function DashboardScreen() {
     };
 
     useEffect(() => {
-        Promise.all([useAuthStore.getState().fetchUser(), fetchArticles(), fetchStats()]).finally(() => {
+        Promise.all([useAuthStore.getState().fetchUser(), fetchArticles('All', null), fetchStats()]).finally(() => {
             setLoading(false);
         });
     }, []);
@@ -58,17 +70,20 @@ export default function DashboardScreen() {
         )
     }
 
-    const heroArticle = articles.length > 0 ? articles[0] : null;
-
-    const filteredArticles = articles.filter(a => selectedDifficulty === 'All' || a.difficulty === selectedDifficulty);
-    const totalPages = Math.ceil(filteredArticles.length / ITEMS_PER_PAGE);
-    const currentArticles = filteredArticles.slice((currentPage - 1) * ITEMS_PER_PAGE, currentPage * ITEMS_PER_PAGE);
+    const handleDifficultyChange = (difficulty: string) => {
+        setSelectedDifficulty(difficulty);
+        setCurrentPage(1);
+        setPageCursors([null]);
+        fetchArticles(difficulty, null);
+    };
 
     const handlePageChange = (page: number) => {
-        if (page >= 1 && page <= totalPages) {
-            setCurrentPage(page);
-            window.scrollTo({ top: 0, behavior: 'smooth' });
-        }
+        if (page < 1 || (page > currentPage && !nextCursor)) return;
+        const cursors = page > currentPage ? [...pageCursors.slice(0, currentPage), nextCursor] : pageCursors;
+        setPageCursors(cursors);
+        setCurrentPage(page);
+        fetchArticles(selectedDifficulty, cursors[page - 1]);
+        window.scrollTo({ top: 0, behavior: 'smooth' });
     };
 
     return (
@@ -105,8 +120,8 @@ export default function DashboardScreen() {
                                         <span className="text-slate-500 text-sm font-medium">Difficulty: <span className="text-slate-900 font-semibold">{heroArticle ? heroArticle.difficulty : 'N/A'}</span></span>
                                         <button
                                             onClick={() => {
-                                                if (articles.length > 0) {
-                                                    router.push(`/read/${articles[0].id}`);
+                                                if (heroArticle) {
+                                                    router.push(`/read/${heroArticle.id}`);
                                                 } else {
                                                     alert("No articles available to read.");
                                                 }
@@ -142,7 +157,7 @@ export default function DashboardScreen() {
                                 {['All', 'Initial', 'Intermediate', 'Upper Intermediate', 'Advanced'].map((diff) => (
                                     <button
                                         key={diff}
-                                        onClick={() => { setSelectedDifficulty(diff); setCurrentPage(1); }}
+                                        onClick={() => handleDifficultyChange(diff)}
                                         className={`border-b-[3px] ${selectedDifficulty === diff ? 'border-[#135bec] text-slate-900' : 'border-transparent text-slate-500 hover:text-slate-700'} pb-3 pt-2 px-1 text-sm font-bold whitespace-nowrap transition-colors`}
                                     >
                                         {diff}
@@ -152,7 +167,7 @@ export default function DashboardScreen() {
                         </div>
 
                         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
-                            {currentArticles.map((article: any) => (
+                            {articles.map((article: any) => (
                                 <Link key={article.id} href={`/read/${article.id}`} className="group flex flex-col gap-3 pb-3 cursor-pointer">
                                     <div className="overflow-hidden rounded-xl">
                                         <div className="w-full bg-center bg-no-repeat aspect-video bg-cover transform group-hover:scale-105 transition-transform duration-500"
@@ -171,7 +186,7 @@ export default function DashboardScreen() {
                         </div>
 
                         {/* Pagination Controls */}
-                        {totalPages > 1 && (
+                        {(currentPage > 1 || nextCursor) && (
                             <div className="flex justify-center items-center gap-4 pt-6 pb-12">
                                 <button
                                     onClick={() => handlePageChange(currentPage - 1)}
@@ -182,11 +197,11 @@ export default function DashboardScreen() {
                                     Previous
                                 </button>
                                 <span className="text-slate-500 text-sm font-medium">
-                                    Page {currentPage} of {totalPages}
+                                    Page {currentPage}
                                 </span>
                                 <button
                                     onClick={() => handlePageChange(currentPage + 1)}
-                                    disabled={currentPage === totalPages}
+                                    disabled={!nextCursor}
                                     className="flex items-center gap-2 px-4 py-2 rounded-lg border border-slate-200 bg-white text-slate-700 font-medium hover:bg-slate-50 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
                                 >
                                     Next
@@ -5,6 +5,7 @@ import ReadingLayout from '@/components/reading/ReadingLayout';
 import ParagraphBlock from '@/components/reading/ParagraphBlock';
 import clsx from 'clsx';
 import api from '@/lib/api';
+import { decodeAnalysis } from '@/lib/analysis';
 import { useRouter } from 'next/navigation';
 import useTheme from '@/lib/useTheme';
 
@@ -24,6 +25,9 @@ export default function ReadingView() {
     const [currentTTSParaIndex, setCurrentTTSParaIndex] = useState<number | null>(null);
     const [isTTSLoading, setIsTTSLoading] = useState(false);
     const [activeParaId, setActiveParaId] = useState<number | null>(null);
+    // Paragraphs of the current page whose analysis is streamed (set once per page load)
+    const [streamIds, setStreamIds] = useState<number[]>([]);
+    const [streamFailed, setStreamFailed] = useState(false);
     const audioRef = useRef<HTMLAudioElement | null>(null);
 
     useEffect(() => {
@@ -33,10 +37,11 @@ export default function ReadingView() {
     const fetchPage = async (pageNum: number) => {
         setLoading(true);
         try {
-            const res = await api.get(`/api/articles/${articleId}/page/${pageNum}`);
+            // Deferred mode: the page comes back right away, missing analysis is streamed in below
+            const res = await api.get(`/api/articles/${articleId}/page/${pageNum}`, { params: { defer_analysis: true, compact_analysis: true } });
             setArticle(res.data.article);
 
-            let paras = res.data.paragraphs;
+            let paras = res.data.paragraphs.map((p: any) => ({ ...p, analysis: decodeAnalysis(p.analysis) }));
             // If the first paragraph is an image that matches the cover image, remove it to avoid duplicates
             if (pageNum === 1 && res.data.article.cover_image) {
                 if (paras.length > 0 && paras[0].image_url === res.data.article.cover_image) {
@@ -45,6 +50,7 @@ export default function ReadingView() {
             }
 
             setParagraphs(paras);
+            setStreamIds(paras.filter((p: any) => p.analysis_pending).map((p: any) => p.id));
             setHasNext(res.data.has_next);
             setPage(pageNum);
         } catch (e) {
@@ -54,6 +60,65 @@ export default function ReadingView() {
         }
     };
 
+    // Stream annotated words of paragraphs whose vocabulary analysis is still being generated in the background
+    useEffect(() => {
+        if (streamIds.length === 0 || streamFailed || typeof EventSource === 'undefined') return;
+
+        let baseUrl = api.defaults.baseURL || "";
+        if (!baseUrl.startsWith('http')) {
+            baseUrl = window.location.origin + baseUrl;
+        }
+        const backendUrl = baseUrl.replace(/\/api\/?$/, '').replace(/\/+$/, '');
+        const query = streamIds.map(id => `ids=${id}`).join('&');
+        const source = new EventSource(`${backendUrl}/api/paragraphs/analysis/stream?${query}`);
+
+        source.addEventListener('token', (e: MessageEvent) => {
+            const { id, index, token } = JSON.parse(e.data);
+            setParagraphs(prev => prev.map(p => {
+                if (p.id !== id) return p;
+                const analysis = p.analysis.slice(0, index);
+                analysis[index] = token;
+                return { ...p, analysis };
+            }));
+        });
+        source.addEventListener('paragraph', (e: MessageEvent) => {
+            const u = JSON.parse(e.data);
+            setParagraphs(prev => prev.map(p => p.id === u.id ? { ...p, analysis: u.analysis, analysis_pending: u.analysis_pending } : p));
+        });
+        source.addEventListener('done', () => source.close());
+        source.onerror = () => {
+            // Fall back to polling instead of letting EventSource reconnect in a loop
+            source.close();
+            setStreamFailed(true);
+        };
+
+        return () => source.close();
+    }, [streamIds, streamFailed]);
+
+    // Polling fallback when streaming is not available
+    useEffect(() => {
+        const pendingIds = paragraphs.filter(p => p.analysis_pending).map(p => p.id);
+        if (pendingIds.length === 0 || (!streamFailed && typeof EventSource !== 'undefined')) return;
+
+        const timer = setTimeout(async () => {
+            try {
+                const res = await api.get('/api/paragraphs/analysis', {
+                    params: { ids: pendingIds, compact_analysis: true },
+                    paramsSerializer: { indexes: null }
+                });
+                const updates = new Map<number, any>(res.data.paragraphs.map((u: any) => [u.id, u]));
+                setParagraphs(prev => prev.map(p => {
+                    const u = updates.get(p.id);
+                    return u ? { ...p, analysis: decodeAnalysis(u.analysis), analysis_pending: u.analysis_pending } : p;
+                }));
+            } catch (e) {
+                console.error("Failed to poll analysis", e);
+            }
+        }, 2000);
+
+        return () => clearTimeout(timer);
+    }, [paragraphs, streamFailed]);
+
     const playParagraphAudio = async (text: string, paraId: number, index: number, audioPath?: string | null) => {
         if (isTTSLoading) return;
 
@@ -18,12 +18,27 @@ export default function StreakCalendar() {
     const [currentYear, setCurrentYear] = useState(today.getFullYear());
     const [currentMonth, setCurrentMonth] = useState(today.getMonth() + 1); // 1-12
     const [records, setRecords] = useState<string[]>([]);
+    const [yearDays, setYearDays] = useState(0);
     const [loading, setLoading] = useState(false);
 
     useEffect(() => {
         fetchRecords(currentYear, currentMonth);
     }, [currentYear, currentMonth]);
 
+    useEffect(() => {
+        fetchYearSummary(currentYear);
+    }, [currentYear]);
+
+    const fetchYearSummary = async (year: number) => {
+        try {
+            // Precomputed monthly rollups summed server-side
+            const res = await api.get(`/users/me/reading-summary`, { params: { year } });
+            setYearDays(res.data.days_read);
+        } catch (e) {
+            console.error("Failed to fetch reading summary", e);
+        }
+    };
+
     const fetchRecords = async (year: number, month: number) => {
         setLoading(true);
         try {
@@ -150,6 +165,8 @@ export default function StreakCalendar() {
             <div className="mt-auto pt-4 border-t border-slate-100 flex items-center justify-between">
                 <p className="text-xs text-slate-500">
                     <strong className="text-slate-700">{records.length}</strong> days this month
+                    {' · '}
+                    <strong className="text-slate-700">{yearDays}</strong> in {currentYear}
                 </p>
                 {loading && (
                     <div className="w-3 h-3 border-2 border-[#135bec] border-t-transparent rounded-full animate-spin"></div>
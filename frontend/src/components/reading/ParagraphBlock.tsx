@@ -153,7 +153,7 @@ export default function ParagraphBlock({ id, content, image_url, audio_path, ana
         }
         setLoadingAction('translation');
         try {
-            const res = await api.post('/api/analyze/translation', null, { params: { paragraph_text: content } });
+            const res = await api.get(`/api/analyze/translation/${id}`);
             setTranslation(res.data.translation);
             setActivePanel('translation');
         } catch (e) {
@@ -174,7 +174,7 @@ export default function ParagraphBlock({ id, content, image_url, audio_path, ana
         }
         setLoadingAction('syntax');
         try {
-            const res = await api.post('/api/analyze/syntax', null, { params: { paragraph_text: content } });
+            const res = await api.get(`/api/analyze/syntax/${id}`);
             setSyntax(res.data.syntax);
             setActivePanel('syntax');
         } catch (e) {
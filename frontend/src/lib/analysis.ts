@@ -0,0 +1,27 @@
+/**
+ * Decoder for the compact vocabulary analysis sent with `compact_analysis=true`
+ * (see backend/analysis_codec.py): strings and token types are stored once and tokens refer to them by index.
+ */
+export interface CompactAnalysis {
+    v: number;
+    s: string[];
+    k: string[];
+    t: number[];
+    w: number[];
+    d: number[];
+    m: number[];
+    g?: (number | null)[];
+}
+
+export function decodeAnalysis(analysis: any[] | CompactAnalysis | null | undefined): any[] {
+    if (!analysis) return [];
+    if (Array.isArray(analysis)) return analysis;
+    const { s, k, t, w, d, m, g } = analysis;
+    return t.map((type, i) => ({
+        text: s[w[i]],
+        type: k[type],
+        definition: s[d[i]],
+        context_meaning: s[m[i]],
+        group_id: g ? g[i] : null,
+    }));
+}